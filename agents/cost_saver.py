@@ -2,6 +2,8 @@ from .base_agent import BaseAgent
 
 
 class CostSaver(BaseAgent):
+    ERROR_PREFIX = "❌ Error in cost estimation:"
+
     def __init__(self):
         super().__init__()
 
@@ -54,4 +56,4 @@ class CostSaver(BaseAgent):
             return response.content[0].text.strip()
 
         except Exception as e:
-            return f"❌ Error in cost estimation: {str(e)}"
+            return f"{self.ERROR_PREFIX} {str(e)}"
@@ -1,6 +1,8 @@
 from .base_agent import BaseAgent
 
 class DataValidator(BaseAgent):
+    ERROR_PREFIX = "❌ Error in validation:"
+
     def __init__(self):
         super().__init__()
 
@@ -43,4 +45,4 @@ class DataValidator(BaseAgent):
             )
             return response.content[0].text.strip()
         except Exception as e:
-            return f"❌ Error in validation: {str(e)}"
+            return f"{self.ERROR_PREFIX} {str(e)}"
@@ -1,12 +1,20 @@
+from typing import List, Optional
+
 from .base_agent import BaseAgent
 
 
 class QueryOptimizer(BaseAgent):
+    ERROR_PREFIX = "Error during optimization:"
+
     def __init__(self):
         super().__init__()
 
-    def optimize_query(self, sql_query: str) -> str:
-        """Optimize an SQL query using Claude."""
+    def optimize_query(self, sql_query: str, similar_examples: Optional[List[dict]] = None) -> str:
+        """Optimize an SQL query using Claude.
+
+        ``similar_examples`` are previously optimized near-duplicates (as returned
+        by ``SimilarQueryIndex.query``) that are shown to the model as few-shot context.
+        """
         
         # Detect SQL statement type
         sql_upper = sql_query.strip().upper()
@@ -29,6 +37,20 @@ class QueryOptimizer(BaseAgent):
         else:
             statement_type = 'UNKNOWN'
         
+        examples_section = ""
+        if similar_examples:
+            examples = []
+            for number, example in enumerate(similar_examples, start=1):
+                examples.append(
+                    f"Example {number} (similarity {example.get('similarity', 0):.2f}):\n"
+                    f"Original:\n{example.get('sql_query', '')}\n"
+                    f"Optimized:\n{example.get('optimized_query', '')}"
+                )
+            examples_section = (
+                "Previously Optimized Similar Queries (reuse their techniques only where they apply to the input):\n"
+                + "\n\n".join(examples)
+            )
+
         # Universal optimization prompt that works for ALL statement types
         prompt = f"""
         You are a MariaDB optimization expert. Your goal is to SIGNIFICANTLY improve query performance, not just make cosmetic changes.
@@ -152,6 +174,8 @@ class QueryOptimizer(BaseAgent):
         - In rationale, explain why it's already optimal
         - DO NOT return the original if there are obvious optimizations like duplicate subqueries
 
+        {examples_section}
+
         Input SQL Statement:
         {sql_query}
 
@@ -191,4 +215,4 @@ class QueryOptimizer(BaseAgent):
             return response.content[0].text.strip()
 
         except Exception as e:
-            return f"Error during optimization: {str(e)}"
+            return f"{self.ERROR_PREFIX} {str(e)}"
@@ -2,10 +2,13 @@ from .base_agent import BaseAgent
 
 
 class SchemaAdvisor(BaseAgent):
+    ERROR_PREFIX = "Error in schema analysis:"
+    CONSOLIDATION_ERROR_PREFIX = "Error in schema consolidation:"
+
     def __init__(self):
         super().__init__()
 
-    def analyze_schema(self, schema_sql: str) -> str:
+    def analyze_schema(self, schema_sql: str, max_tokens: int = 500) -> str:
         """Analyze schema and suggest improvements using Claude."""
         prompt = f"""
         You are a MariaDB Schema Design Advisor.
@@ -28,6 +31,91 @@ class SchemaAdvisor(BaseAgent):
         - Operational Notes: <details or "None">
         """
 
+        try:
+            response = self.client.messages.create(
+                model=self.model_name,
+                max_tokens=max_tokens,
+                temperature=0,
+                system="You are an expert in MariaDB schema design and optimization.",
+                messages=[
+                    {"role": "user", "content": prompt}
+                ]
+            )
+
+            return response.content[0].text.strip()
+
+        except Exception as e:
+            return f"{self.ERROR_PREFIX} {str(e)}"
+
+    def consolidate_reports(self, chunk_reports: list, cross_table_findings: list, max_tokens: int = 1500) -> str:
+        """Merge per-chunk schema reviews into one report using Claude."""
+        reports = "\n\n".join(
+            f"Report {number}:\n{report}" for number, report in enumerate(chunk_reports, start=1)
+        )
+        findings = "\n".join(f"- {finding}" for finding in cross_table_findings) or "None"
+        prompt = f"""
+        You are a MariaDB Schema Design Advisor.
+
+        A large schema was reviewed in independent chunks (grouped by foreign-key cluster).
+        Merge the chunk reports below into a single report:
+        - Deduplicate repeated advice and keep the most specific version.
+        - Order recommendations by expected impact across the whole schema.
+        - Fold in the cross-table findings, which were computed over the complete dump.
+
+        Cross-Table Findings:
+        {findings}
+
+        Chunk Reports:
+        {reports}
+
+        Structured Recommendations:
+        - Indexing: <details>
+        - Data Modeling: <details>
+        - Data Types: <details>
+        - MariaDB Compatibility: <issues + alternatives>
+        - Cross-Table Issues: <FK index gaps, type mismatches, dangling references>
+        - Operational Notes: <details or "None">
+        """
+
+        try:
+            response = self.client.messages.create(
+                model=self.model_name,
+                max_tokens=max_tokens,
+                temperature=0,
+                system="You are an expert in MariaDB schema design and optimization.",
+                messages=[
+                    {"role": "user", "content": prompt}
+                ]
+            )
+
+            return response.content[0].text.strip()
+
+        except Exception as e:
+            return f"{self.CONSOLIDATION_ERROR_PREFIX} {str(e)}"
+
+
+    def review_index_plan(self, index_plan: str) -> str:
+        """Explain a workload-derived index plan using Claude."""
+        prompt = f"""
+        You are a MariaDB Schema Design Advisor.
+
+        The following composite indexes were computed locally from a weighted query workload.
+        Each index lists the share of the workload it serves; prefix-redundant candidates have already been pruned.
+
+        Tasks:
+        - Explain, in priority order, why each proposed index helps the workload and what it costs on writes and storage.
+        - Recommend which existing indexes can be dropped once the proposals are in place.
+        - Flag any proposal that looks risky (very wide keys, low-cardinality leading columns, hot write tables).
+
+        Index Plan:
+        {index_plan}
+
+        Structured Recommendations:
+        - Create: <indexes + justification>
+        - Drop: <redundant indexes or "None">
+        - Risks: <details or "None">
+        """
+
         try:
             response = self.client.messages.create(
                 model=self.model_name,
@@ -42,4 +130,4 @@ class SchemaAdvisor(BaseAgent):
             return response.content[0].text.strip()
 
         except Exception as e:
-            return f"Error in schema analysis: {str(e)}"
+            return f"Error in index plan review: {str(e)}"
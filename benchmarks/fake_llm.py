@@ -0,0 +1,94 @@
+"""Drop-in fake for the Anthropic client with configurable latency and errors."""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from types import SimpleNamespace
+from typing import Optional
+
+CANNED_OPTIMIZER_RESPONSE = """Optimized SQL Query:
+SELECT o.id, o.total FROM orders o WHERE o.customer_id = 42 ORDER BY o.created_at DESC LIMIT 20;
+
+Rationale:
+- Replaced SELECT * with the two columns the caller reads.
+- An index on (customer_id, created_at) serves both the filter and the sort.
+"""
+
+
+class LatencyModel:
+    """Sample per-call latency (seconds) and decide whether a call fails.
+
+    ``distribution`` is ``constant``, ``uniform`` (mean +/- jitter) or
+    ``lognormal`` (median ``mean_ms`` with shape ``sigma``).
+    """
+
+    def __init__(
+        self,
+        mean_ms: float = 0.0,
+        distribution: str = "constant",
+        jitter_ms: float = 0.0,
+        sigma: float = 0.5,
+        error_rate: float = 0.0,
+        seed: Optional[int] = 1234,
+    ) -> None:
+        if distribution not in ("constant", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {distribution}")
+        self.mean_ms = mean_ms
+        self.distribution = distribution
+        self.jitter_ms = jitter_ms
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self) -> float:
+        with self._lock:
+            if self.distribution == "uniform":
+                value = self._random.uniform(self.mean_ms - self.jitter_ms, self.mean_ms + self.jitter_ms)
+            elif self.distribution == "lognormal" and self.mean_ms > 0:
+                value = self._random.lognormvariate(0.0, self.sigma) * self.mean_ms
+            else:
+                value = self.mean_ms
+        return max(value, 0.0) / 1000.0
+
+    def should_fail(self) -> bool:
+        if self.error_rate <= 0:
+            return False
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+
+class FakeLLMError(RuntimeError):
+    """Raised by the fake client to emulate an API failure."""
+
+
+class _FakeMessages:
+    def __init__(self, model: LatencyModel, response_text: str) -> None:
+        self._model = model
+        self._response_text = response_text
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        delay = self._model.sample()
+        if delay:
+            time.sleep(delay)
+        if self._model.should_fail():
+            raise FakeLLMError("simulated overloaded_error")
+        return SimpleNamespace(content=[SimpleNamespace(text=self._response_text)])
+
+
+def fake_anthropic_factory(model: Optional[LatencyModel] = None, response_text: str = CANNED_OPTIMIZER_RESPONSE):
+    """Return a class usable in place of ``anthropic.Anthropic``."""
+    latency_model = model or LatencyModel()
+
+    class FakeAnthropic:
+        def __init__(self, api_key: str = "", **kwargs) -> None:
+            self.messages = _FakeMessages(latency_model, response_text)
+
+    return FakeAnthropic
+
+
+__all__ = ["CANNED_OPTIMIZER_RESPONSE", "FakeLLMError", "LatencyModel", "fake_anthropic_factory"]
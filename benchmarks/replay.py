@@ -0,0 +1,358 @@
+"""Replay recorded traffic against a running instance of the service.
+
+Examples:
+    python -m benchmarks.replay data/history.jsonl --base-url http://127.0.0.1:8000
+    python -m benchmarks.replay data/history.jsonl --speed 4 --output replay.json
+    python -m benchmarks.replay capture.jsonl --mode closed --concurrency 16
+
+Input lines are either ``HistoryStore`` entries (``type``/``received_at``/
+``request``) or capture records with ``path`` (or ``endpoint``), optional
+``method``, ``body``, ``timestamp``/``offset`` and the caller's ``client_id``
+and ``priority`` (or ``X-Client-Id``/``X-Priority-Class`` under ``headers``).
+Records that do not name a caller are spread round-robin over ``--clients``
+client IDs and sent as ``--priority`` (default ``api``), so per-client quotas
+and class weights see a realistic mix. Open-loop mode sends each
+request at its recorded offset divided by ``--speed`` (or at a fixed
+``--rate``), whether or not earlier requests have finished, and measures
+latency from the intended send time so a saturated server is not hidden.
+Closed-loop mode keeps ``--concurrency`` requests in flight back to back.
+
+History entries are spaced by ``received_at``, the time the server accepted
+the request. Older entries only carry ``timestamp``, which is written when the
+response completes; for those the spacing is approximate (slow requests look
+like late arrivals and overlapping requests may be reordered).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# History entry type -> endpoint that produced it.
+HISTORY_ENDPOINTS = {
+    "analysis": "/analyze",
+    "optimize": "/optimize",
+    "analyze_schema": "/analyze-schema",
+    "save_cost": "/save-cost",
+    "validate_query": "/validate-query",
+    "advise_indexes": "/advise-indexes",
+}
+
+# Replayed item: (offset_seconds, kind, method, path, body, headers)
+ReplayItem = Tuple[float, str, str, str, Optional[Dict[str, Any]], Dict[str, str]]
+# Sender result: (status_code, error message or None); status 0 means no response.
+Sender = Callable[[ReplayItem], Tuple[int, Optional[str]]]
+
+
+def _parse_timestamp(value: Any) -> Optional[float]:
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            return None
+    return None
+
+
+def _history_body(entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    request = entry.get("request") or {}
+    if entry["type"] == "advise_indexes":
+        # Uploaded workloads are not stored; replay against the history window instead.
+        return {"history_limit": max(int(request.get("query_count") or 0), 1)}
+    return request or None
+
+
+def _caller_headers(record: Dict[str, Any]) -> Dict[str, str]:
+    """Scheduling headers recorded with a capture record, if any."""
+    recorded = {str(name).lower(): value for name, value in (record.get("headers") or {}).items()}
+    headers = {}
+    client_id = record.get("client_id") or recorded.get("x-client-id")
+    priority = record.get("priority") or recorded.get("x-priority-class")
+    if client_id:
+        headers["X-Client-Id"] = str(client_id)
+    if priority:
+        headers["X-Priority-Class"] = str(priority)
+    return headers
+
+
+def to_replay_item(record: Dict[str, Any]) -> Optional[ReplayItem]:
+    """Convert a history entry or capture record; ``None`` if it cannot be replayed."""
+    if "type" in record and "path" not in record and "endpoint" not in record:
+        path = HISTORY_ENDPOINTS.get(record["type"])
+        if path is None:
+            return None
+        body = _history_body(record)
+        if body is None:
+            return None
+        return 0.0, record["type"], "POST", path, body, {}
+
+    path = record.get("path") or record.get("endpoint")
+    if not path:
+        return None
+    path = path if path.startswith("/") else f"/{path}"
+    method = str(record.get("method") or ("POST" if record.get("body") is not None else "GET")).upper()
+    kind = record.get("kind") or path.split("?", 1)[0].strip("/") or "root"
+    return 0.0, kind, method, path, record.get("body"), _caller_headers(record)
+
+
+def load_workload(
+    lines: Iterable[str],
+    limit: Optional[int] = None,
+    clients: int = 16,
+    priority: str = "api",
+) -> List[ReplayItem]:
+    """Parse JSONL records into replay items ordered by their relative send offset.
+
+    Items without a recorded client are assigned ``replay-0`` ..
+    ``replay-<clients - 1>`` in turn, and those without a recorded priority
+    get ``priority``.
+    """
+    parsed: List[Tuple[Optional[float], ReplayItem]] = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if not isinstance(record, dict):
+            continue
+        item = to_replay_item(record)
+        if item is None:
+            continue
+        if "offset" in record:
+            moment = _parse_timestamp(record["offset"])
+        elif "received_at" in record:
+            moment = _parse_timestamp(record["received_at"])
+        else:
+            moment = _parse_timestamp(record.get("timestamp"))
+        parsed.append((moment, item))
+        if limit is not None and len(parsed) >= limit:
+            break
+
+    known = [moment for moment, _ in parsed if moment is not None]
+    start = min(known) if known else 0.0
+    items: List[ReplayItem] = []
+    previous = 0.0
+    for moment, (_, kind, method, path, body, headers) in parsed:
+        # Records without a timestamp are sent right after the one before them.
+        offset = previous if moment is None else max(moment - start, 0.0)
+        items.append((offset, kind, method, path, body, headers))
+        previous = offset
+    items.sort(key=lambda item: item[0])
+
+    anonymous = 0
+    for _, _, _, _, _, headers in items:
+        headers.setdefault("X-Priority-Class", priority)
+        if "X-Client-Id" not in headers:
+            headers["X-Client-Id"] = f"replay-{anonymous % max(clients, 1)}"
+            anonymous += 1
+    return items
+
+
+def http_sender(base_url: str, timeout: float = 300.0, headers: Optional[Dict[str, str]] = None) -> Sender:
+    """Return a sender that issues replay items over HTTP with ``urllib``.
+
+    Each item's own headers override ``headers``.
+    """
+    base = base_url.rstrip("/")
+    extra_headers = dict(headers or {})
+
+    def send(item: ReplayItem) -> Tuple[int, Optional[str]]:
+        _, _, method, path, body, item_headers = item
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8") if body is not None else None
+        request = urllib.request.Request(
+            base + path, data=data, method=method, headers={**extra_headers, **item_headers}
+        )
+        if data is not None:
+            request.add_header("Content-Type", "application/json")
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                response.read()
+                return response.status, None
+        except urllib.error.HTTPError as exc:
+            return exc.code, f"HTTP {exc.code}"
+        except (urllib.error.URLError, OSError) as exc:
+            return 0, str(getattr(exc, "reason", exc))
+
+    return send
+
+
+def _percentile(samples: List[float], fraction: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summarize(outcomes: List[Tuple[str, float, int, Optional[str]]], elapsed: float) -> Dict[str, Any]:
+    """Aggregate ``(kind, latency_seconds, status, error)`` outcomes per endpoint kind."""
+    groups: Dict[str, List[Tuple[str, float, int, Optional[str]]]] = {}
+    for outcome in outcomes:
+        groups.setdefault(outcome[0], []).append(outcome)
+    groups = dict(sorted(groups.items()))
+    groups["all"] = outcomes
+
+    report: Dict[str, Any] = {}
+    for kind, group in groups.items():
+        latencies = [latency for _, latency, _, _ in group]
+        errors = [outcome for outcome in group if outcome[3] is not None or not 200 <= outcome[2] < 400]
+        status_counts: Dict[str, int] = {}
+        for _, _, status, _ in group:
+            status_counts[str(status)] = status_counts.get(str(status), 0) + 1
+        report[kind] = {
+            "requests": len(group),
+            "throughput_rps": round(len(group) / elapsed, 3) if elapsed > 0 else None,
+            "error_rate": round(len(errors) / len(group), 4) if group else 0.0,
+            "status_counts": status_counts,
+            **{
+                f"latency_{name}_ms": round(value * 1000, 1) if value is not None else None
+                for name, value in (
+                    ("p50", _percentile(latencies, 0.50)),
+                    ("p95", _percentile(latencies, 0.95)),
+                    ("p99", _percentile(latencies, 0.99)),
+                    ("max", max(latencies) if latencies else None),
+                )
+            },
+        }
+    return report
+
+
+def replay_open_loop(
+    items: List[ReplayItem],
+    sender: Sender,
+    speed: float = 1.0,
+    rate: Optional[float] = None,
+    max_in_flight: int = 256,
+    clock: Callable[[], float] = time.perf_counter,
+    sleep: Callable[[float], None] = time.sleep,
+) -> Tuple[List[Tuple[str, float, int, Optional[str]]], float]:
+    """Send each item at its scheduled time regardless of outstanding requests."""
+    if speed <= 0:
+        raise ValueError("speed must be positive")
+    outcomes: List[Tuple[str, float, int, Optional[str]]] = []
+    lock = threading.Lock()
+
+    def run(item: ReplayItem, due: float) -> None:
+        status, error = sender(item)
+        # Latency counts from the intended send time, so queueing in the
+        # replayer or a stalled server shows up instead of being omitted.
+        with lock:
+            outcomes.append((item[1], clock() - due, status, error))
+
+    started = clock()
+    with ThreadPoolExecutor(max_workers=max(1, max_in_flight)) as executor:
+        for number, item in enumerate(items):
+            offset = number / rate if rate else item[0] / speed
+            due = started + offset
+            delay = due - clock()
+            if delay > 0:
+                sleep(delay)
+            executor.submit(run, item, due)
+    return outcomes, clock() - started
+
+
+def replay_closed_loop(
+    items: List[ReplayItem],
+    sender: Sender,
+    concurrency: int = 8,
+    clock: Callable[[], float] = time.perf_counter,
+) -> Tuple[List[Tuple[str, float, int, Optional[str]]], float]:
+    """Keep ``concurrency`` requests in flight, issuing the next as each completes."""
+    outcomes: List[Tuple[str, float, int, Optional[str]]] = []
+    lock = threading.Lock()
+    pending = iter(items)
+
+    def worker() -> None:
+        while True:
+            with lock:
+                item = next(pending, None)
+            if item is None:
+                return
+            sent = clock()
+            status, error = sender(item)
+            with lock:
+                outcomes.append((item[1], clock() - sent, status, error))
+
+    started = clock()
+    threads = [threading.Thread(target=worker) for _ in range(max(1, concurrency))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return outcomes, clock() - started
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Render the per-kind report as a fixed-width table."""
+    header = f"{'endpoint':<18}{'requests':>9}{'req/s':>9}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    lines = [header, "-" * len(header)]
+    for kind, row in report.items():
+        lines.append(
+            f"{kind:<18}{row['requests']:>9}{row['throughput_rps'] or 0:>9.2f}{row['error_rate']:>8.1%}"
+            f"{row['latency_p50_ms'] or 0:>10.1f}{row['latency_p95_ms'] or 0:>10.1f}{row['latency_p99_ms'] or 0:>10.1f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("workload", type=Path, help="History or capture JSONL file")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--mode", choices=["open", "closed"], default="open")
+    parser.add_argument("--speed", type=float, default=1.0, help="Open loop: replay this many times faster than recorded")
+    parser.add_argument("--rate", type=float, help="Open loop: ignore timestamps and send at this many requests/s")
+    parser.add_argument("--concurrency", type=int, default=8, help="Closed loop: requests kept in flight")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="Open loop: cap on outstanding requests")
+    parser.add_argument("--limit", type=int, help="Replay only the first N records")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Per-request timeout in seconds")
+    parser.add_argument("--priority", default="api", help="X-Priority-Class for records that do not record one")
+    parser.add_argument("--clients", type=int, default=16, help="Client IDs to rotate through for records without one")
+    parser.add_argument("--api-key", help="X-API-Key to send; its class caps the recorded priorities and enables client IDs")
+    parser.add_argument("--output", help="Write the JSON report to this path")
+    args = parser.parse_args(argv)
+
+    with args.workload.open("r", encoding="utf-8") as handle:
+        items = load_workload(handle, limit=args.limit, clients=args.clients, priority=args.priority)
+    if not items:
+        print(f"No replayable records in {args.workload}", file=sys.stderr)
+        return 1
+
+    sender = http_sender(args.base_url, timeout=args.timeout, headers={"X-API-Key": args.api_key} if args.api_key else None)
+    if args.mode == "open":
+        outcomes, elapsed = replay_open_loop(items, sender, speed=args.speed, rate=args.rate, max_in_flight=args.max_in_flight)
+    else:
+        outcomes, elapsed = replay_closed_loop(items, sender, concurrency=args.concurrency)
+
+    report = {
+        "meta": {
+            "workload": str(args.workload),
+            "base_url": args.base_url,
+            "mode": args.mode,
+            "speed": args.speed if args.mode == "open" and not args.rate else None,
+            "rate": args.rate if args.mode == "open" else None,
+            "concurrency": args.concurrency if args.mode == "closed" else None,
+            "recorded_span_s": round(items[-1][0], 3),
+            "elapsed_s": round(elapsed, 3),
+        },
+        "endpoints": summarize(outcomes, elapsed),
+    }
+    print(format_report(report["endpoints"]))
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,351 @@
+"""Run offline benchmarks and compare them against a stored baseline.
+
+Examples:
+    python -m benchmarks.run --quick --output bench_output.json
+    python -m benchmarks.run --quick --compare benchmarks/baseline.json
+    python -m benchmarks.run --suite history --sizes 1000,10000,100000,1000000
+
+Suites whose dependencies are missing (e.g. ``fastapi``/``httpx`` for the
+ASGI suite) are reported as skipped. A comparison run exits with status 1
+when any metric present in both runs is worse than the baseline by more
+than ``--tolerance``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.fake_llm import LatencyModel, fake_anthropic_factory
+
+SAMPLE_QUERY = (
+    "SELECT o.id, o.total, c.name FROM orders o JOIN customers c ON o.customer_id = c.id "
+    "WHERE o.status = 'open' AND o.created_at >= '2024-01-01' ORDER BY o.created_at DESC LIMIT 50"
+)
+
+Result = Dict[str, Any]
+
+
+def _result(name: str, value: float, unit: str, better: str) -> Result:
+    return {"name": name, "value": round(value, 4), "unit": unit, "better": better}
+
+
+def _percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _latency_results(prefix: str, samples: List[float], unit: str = "us") -> List[Result]:
+    scale = 1_000_000 if unit == "us" else 1000
+    return [
+        _result(f"{prefix}.p50", _percentile(samples, 0.50) * scale, unit, "lower"),
+        _result(f"{prefix}.p95", _percentile(samples, 0.95) * scale, unit, "lower"),
+    ]
+
+
+def _time_calls(function: Callable[[], Any], iterations: int) -> List[float]:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def bench_parsing(quick: bool) -> List[Result]:
+    """Local SQL parsing paths that run on every request or history append."""
+    from utils.schema_chunker import build_chunks
+    from utils.similarity_index import SimilarQueryIndex
+    from utils.sql_parsing import normalize_sql
+    from utils.workload_advisor import WorkloadIndexAdvisor
+
+    iterations = 500 if quick else 5000
+    results = _latency_results("parsing.normalize_sql", _time_calls(lambda: normalize_sql(SAMPLE_QUERY), iterations))
+
+    index = SimilarQueryIndex()
+    for number in range(500 if quick else 5000):
+        index.add(SAMPLE_QUERY.replace("o.total", f"o.col_{number}"), "SELECT 1")
+    results += _latency_results("parsing.similar_query", _time_calls(lambda: index.query(SAMPLE_QUERY), iterations // 5))
+
+    workload = [SAMPLE_QUERY.replace("'open'", f"'s{number}'").replace("o.status", f"o.c{number % 50}") for number in range(5000 if quick else 50000)]
+    started = time.perf_counter()
+    advisor = WorkloadIndexAdvisor()
+    advisor.add_queries(workload)
+    advisor.recommend()
+    results.append(_result("parsing.workload_advisor.queries_per_s", len(workload) / (time.perf_counter() - started), "ops/s", "higher"))
+
+    dump = "\n".join(
+        f"CREATE TABLE t{number} (id INT PRIMARY KEY, parent_id INT, note VARCHAR(200), "
+        f"FOREIGN KEY (parent_id) REFERENCES t{max(number - 1, 0)} (id));"
+        for number in range(300)
+    )
+    results += _latency_results("parsing.build_chunks_300_tables", _time_calls(lambda: build_chunks(dump), 5 if quick else 20), unit="ms")
+    return results
+
+
+def bench_history(quick: bool, sizes: List[int], threads: int = 8) -> List[Result]:
+    """HistoryStore append and read throughput under thread contention."""
+    from utils.history_store import HistoryStore
+
+    payload = {
+        "type": "analysis",
+        "request": {"sql_query": SAMPLE_QUERY},
+        "response": {"optimized_query": SAMPLE_QUERY, "validation_report": "- Syntax Compliance: pass"},
+    }
+    results: List[Result] = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            store = HistoryStore(Path(directory) / "history.jsonl")
+            per_thread = max(size // threads, 1)
+            append_samples: List[List[float]] = [[] for _ in range(threads)]
+
+            def writer(slot: int) -> None:
+                samples = append_samples[slot]
+                for _ in range(per_thread):
+                    started = time.perf_counter()
+                    store.append(payload)
+                    samples.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            workers = [threading.Thread(target=writer, args=(slot,)) for slot in range(threads)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            elapsed = time.perf_counter() - started
+            flat = [sample for samples in append_samples for sample in samples]
+            results.append(_result(f"history.append.n{size}.throughput", len(flat) / elapsed, "ops/s", "higher"))
+            results += _latency_results(f"history.append.n{size}", flat)
+
+            # Reads contend with a writer that keeps appending.
+            stop = threading.Event()
+
+            def background_writer() -> None:
+                while not stop.is_set():
+                    store.append(payload)
+
+            writer_thread = threading.Thread(target=background_writer)
+            writer_thread.start()
+            read_iterations = 20 if quick or size >= 100_000 else 100
+            try:
+                read_samples = _time_calls(lambda: store.get_recent(limit=20), read_iterations)
+                metrics_samples = _time_calls(store.metrics, read_iterations)
+            finally:
+                stop.set()
+                writer_thread.join()
+            results += _latency_results(f"history.get_recent.n{size}", read_samples, unit="ms")
+            results += _latency_results(f"history.metrics.n{size}", metrics_samples, unit="ms")
+    return results
+
+
+def _load_app(latency: LatencyModel, concurrency: int, data_dir: Path):
+    """Import ``main`` and rebuild its agents, scheduler and stores for one run.
+
+    ``main`` is imported once per process, so everything that depends on the
+    latency model, the concurrency or the data directory is replaced here
+    rather than configured through the environment. EXPLAIN capture and
+    storage stats are disabled so runs never touch a live database.
+    """
+    os.environ.setdefault("CLAUDE_API_KEY", "benchmark-key")
+    # Keeps the first import away from the real data/ directory.
+    os.environ["DATA_DIR"] = str(data_dir)
+
+    import agents.base_agent as base_agent_module
+
+    base_agent_module.Anthropic = fake_anthropic_factory(latency)
+    import main
+    from agents import CostSaver, DataValidator, QueryOptimizer, SchemaAdvisor
+    from utils import HistoryStore, JobQueue, PlanTracker, PriorityScheduler, SimilarQueryIndex
+
+    main.query_optimizer = QueryOptimizer()
+    main.schema_advisor = SchemaAdvisor()
+    main.cost_saver = CostSaver()
+    main.data_validator = DataValidator()
+    main.initialization_error = None
+    main.agent_scheduler = PriorityScheduler(capacity=concurrency, client_limit=concurrency)
+
+    main.PLAN_TRACKING = False
+    main.storage_stats_collector = None
+    main.plan_tracker = PlanTracker()
+    main.similar_queries = SimilarQueryIndex()
+    main.history_store = HistoryStore(data_dir / "history.jsonl")
+    main.history_store.add_listener(main.similar_queries.add_history_entry)
+    main.job_queue = JobQueue(data_dir / "jobs.sqlite3", handlers=main.job_queue.handlers, workers=main.JOB_WORKERS)
+    return main
+
+
+def bench_prompts(quick: bool) -> List[Result]:
+    """Prompt building and response parsing with a zero-latency fake client."""
+    with tempfile.TemporaryDirectory() as directory:
+        main = _load_app(LatencyModel(), 1, Path(directory))
+        iterations = 200 if quick else 2000
+        examples = [{"sql_query": SAMPLE_QUERY, "optimized_query": SAMPLE_QUERY, "similarity": 0.9}]
+        results = _latency_results(
+            "prompts.optimize_query",
+            _time_calls(lambda: main.query_optimizer.optimize_query(SAMPLE_QUERY, similar_examples=examples), iterations),
+        )
+        results += _latency_results(
+            "prompts.validate_query", _time_calls(lambda: main.data_validator.validate_query(SAMPLE_QUERY), iterations)
+        )
+        text = main.query_optimizer.optimize_query(SAMPLE_QUERY)
+        results += _latency_results(
+            "prompts.split_optimizer_output", _time_calls(lambda: main.split_optimizer_output(text), iterations * 5)
+        )
+    return results
+
+
+def bench_analyze(quick: bool, latency_ms: float, distribution: str, error_rate: float, concurrency: int) -> List[Result]:
+    """End-to-end ``/analyze`` through the ASGI app with a latency-injecting fake LLM."""
+    import httpx
+
+    requests_total = 50 if quick else 500
+    latency = LatencyModel(mean_ms=latency_ms, distribution=distribution, jitter_ms=latency_ms / 2, error_rate=error_rate)
+    with tempfile.TemporaryDirectory() as directory:
+        main = _load_app(latency, concurrency, Path(directory))
+
+        async def drive() -> List[tuple]:
+            semaphore = asyncio.Semaphore(concurrency)
+            async with httpx.AsyncClient(app=main.app, base_url="http://benchmark", timeout=None) as client:
+                async def one(number: int) -> tuple:
+                    async with semaphore:
+                        started = time.perf_counter()
+                        response = await client.post(
+                            "/analyze", json={"sql_query": SAMPLE_QUERY.replace("50", str(number))}
+                        )
+                        body = response.json() if response.status_code == 200 else {}
+                        degraded = any(
+                            isinstance(value, str) and value.startswith(("Error", "❌"))
+                            for value in body.values()
+                        )
+                        return time.perf_counter() - started, response.status_code, degraded
+
+                return await asyncio.gather(*(one(number) for number in range(requests_total)))
+
+        started = time.perf_counter()
+        outcomes = asyncio.run(drive())
+        elapsed = time.perf_counter() - started
+
+    samples = [duration for duration, _, _ in outcomes]
+    prefix = f"analyze.c{concurrency}.{distribution}{int(latency_ms)}ms"
+    results = [_result(f"{prefix}.throughput", len(outcomes) / elapsed, "req/s", "higher")]
+    results += _latency_results(prefix, samples, unit="ms")
+    results.append(_result(f"{prefix}.http_error_rate", sum(status >= 400 for _, status, _ in outcomes) / len(outcomes), "ratio", "lower"))
+    results.append(_result(f"{prefix}.degraded_rate", sum(degraded for _, _, degraded in outcomes) / len(outcomes), "ratio", "lower"))
+    return results
+
+
+def best_of(runs: List[List[Result]]) -> List[Result]:
+    """Merge repeated runs, keeping the best value per metric to damp noise."""
+    merged: Dict[str, Result] = {}
+    for run in runs:
+        for result in run:
+            current = merged.get(result["name"])
+            if current is None:
+                merged[result["name"]] = dict(result)
+                continue
+            pick = min if result["better"] == "lower" else max
+            current["value"] = pick(current["value"], result["value"])
+    return list(merged.values())
+
+
+def compare_results(current: List[Result], baseline: List[Result], tolerance: float) -> List[str]:
+    """Return a description of every metric that regressed beyond ``tolerance``."""
+    baseline_by_name = {result["name"]: result for result in baseline}
+    regressions = []
+    for result in current:
+        reference = baseline_by_name.get(result["name"])
+        if reference is None:
+            continue
+        before, after = reference["value"], result["value"]
+        if result["better"] == "lower":
+            # Allow a small absolute floor so near-zero ratios do not flap.
+            limit = before * (1 + tolerance) + (0.01 if result["unit"] == "ratio" else 0)
+            worse = after > limit
+        else:
+            limit = before * (1 - tolerance)
+            worse = after < limit
+        if worse:
+            regressions.append(f"{result['name']}: {after} {result['unit']} vs baseline {before} (limit {round(limit, 4)})")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--suite", action="append", choices=["parsing", "history", "prompts", "analyze"], help="Suites to run (default: all)")
+    parser.add_argument("--quick", action="store_true", help="Fewer iterations and smaller history sizes")
+    parser.add_argument("--sizes", help="Comma-separated HistoryStore record counts")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Mean fake LLM latency per call")
+    parser.add_argument("--distribution", default="lognormal", choices=["constant", "uniform", "lognormal"])
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of fake LLM calls that fail")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent /analyze requests")
+    parser.add_argument("--repeat", type=int, default=3, help="Run each suite N times and keep the best value per metric")
+    parser.add_argument("--output", help="Write results JSON to this path")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed relative regression")
+    parser.add_argument("--save-baseline", help="Write results JSON as the new baseline")
+    args = parser.parse_args(argv)
+
+    suites = args.suite or ["parsing", "history", "prompts", "analyze"]
+    if args.sizes:
+        sizes = [int(size) for size in args.sizes.split(",")]
+    else:
+        sizes = [1000, 10000] if args.quick else [1000, 10000, 100000]
+
+    runners = {
+        "parsing": lambda: bench_parsing(args.quick),
+        "history": lambda: bench_history(args.quick, sizes),
+        "prompts": lambda: bench_prompts(args.quick),
+        "analyze": lambda: bench_analyze(args.quick, args.latency_ms, args.distribution, args.error_rate, args.concurrency),
+    }
+    results: List[Result] = []
+    skipped: Dict[str, str] = {}
+    for suite in suites:
+        try:
+            suite_results = best_of([runners[suite]() for _ in range(max(args.repeat, 1))])
+        except ImportError as exc:
+            skipped[suite] = f"missing dependency: {exc.name}"
+            print(f"- {suite}: skipped ({skipped[suite]})")
+            continue
+        for result in suite_results:
+            print(f"{result['name']}: {result['value']} {result['unit']}")
+        results += suite_results
+
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "quick": args.quick,
+            "repeat": args.repeat,
+            "skipped": skipped,
+        },
+        "results": results,
+    }
+    for path in (args.output, args.save_baseline):
+        if path:
+            Path(path).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        regressions = compare_results(results, baseline["results"], args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"- {line}")
+            return 1
+        print(f"\nNo regressions beyond {args.tolerance:.0%} against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
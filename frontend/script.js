@@ -366,6 +366,44 @@ const addStatusBadge = (text) => {
     return text;
 };
 
+// Show the closest previously optimized query while the full analysis runs
+const showSimilarPastResult = async (sqlQuery, isStillLoading) => {
+    try {
+        const response = await fetch("/similar?limit=1", {
+            method: "POST",
+            headers: {
+                "Content-Type": "application/json",
+            },
+            body: JSON.stringify({ sql_query: sqlQuery }),
+        });
+        if (!response.ok || !isStillLoading()) {
+            return;
+        }
+
+        const { matches } = await response.json();
+        if (!matches || !matches.length || !isStillLoading()) {
+            return;
+        }
+
+        const match = matches[0];
+        const similarSection = formatSection(
+            `Similar Past Result (${Math.round(match.similarity * 100)}% match)`,
+            "history",
+            "icon-queries",
+            `
+                ${formatSQLBlock("Previously Analyzed Query", escapeText(match.sql_query || ""), "file-code")}
+                ${formatSQLBlock("Its Optimized Query", escapeText(extractSQLFromResponse(match.optimized_query || "")), "check-circle")}
+            `
+        );
+        resultsDiv.insertAdjacentHTML("afterbegin", similarSection);
+        if (window.Prism) {
+            Prism.highlightAll();
+        }
+    } catch (err) {
+        console.error('Similar query lookup failed:', err);
+    }
+};
+
 form.addEventListener("submit", async (e) => {
     e.preventDefault();
 
@@ -378,6 +416,8 @@ form.addEventListener("submit", async (e) => {
     `;
     
     const formData = new FormData(form);
+    const loadingMarker = resultsDiv.querySelector(".loading");
+    showSimilarPastResult(formData.get("query") || "", () => resultsDiv.contains(loadingMarker));
 
     try {
         const response = await fetch("/analyze", {
@@ -385,6 +425,8 @@ form.addEventListener("submit", async (e) => {
             headers: {
                 "Content-Type": "application/json",
             },
+            // The session cookie set by the UI page schedules this ahead of API and bulk analyses
+            credentials: "same-origin",
             body: JSON.stringify({
                 sql_query: formData.get("query") || "",
             }),
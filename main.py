@@ -1,12 +1,32 @@
+import asyncio
 import base64
+import os
+from functools import partial
+from datetime import datetime, timezone
 from pathlib import Path
-from fastapi import FastAPI, HTTPException, Response
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel
+from pydantic import AnyHttpUrl, BaseModel, ValidationError
 from dotenv import load_dotenv
 from agents import QueryOptimizer, SchemaAdvisor, CostSaver, DataValidator
-from utils import HistoryStore
+from db.mariadb_client import execute_explain, execute_query
+from utils import HistoryStore, JobQueue, PlanTracker, PriorityScheduler, SimilarQueryIndex, StorageStatsCollector, WorkloadIndexAdvisor
+from utils.plan_tracker import EXPLAINABLE_PREFIXES, summarize_explain
+from utils.http_cache import is_not_modified, settled_last_modified, validator_headers, weak_etag
+from utils.job_queue import JobFailed, post_callback, validate_callback_url
+from utils.request_identity import UI_SESSION_COOKIE, CallerResolver, parse_api_keys, parse_networks
+from utils.schema_chunker import build_chunks, estimate_tokens, group_reports, map_output_tokens, reduce_output_tokens
+from utils.sql_parsing import fingerprint_sql
+from utils.workload_advisor import INDEX_STATISTICS_SQL, format_index_plan
+
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:  # Brotli is optional; gzip covers every client
+    BrotliMiddleware = None
 
 # Load environment variables from .env file if present
 load_dotenv()
@@ -14,8 +34,69 @@ load_dotenv()
 # FastAPI instance
 app = FastAPI(title="MariaDB Query Optimizer API 🚀")
 
+# Compress large JSON bodies (agent reports, history); brotli when installed
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", 1000))
+if BrotliMiddleware is not None:
+    app.add_middleware(BrotliMiddleware, minimum_size=COMPRESSION_MIN_BYTES, gzip_fallback=True)
+else:
+    app.add_middleware(GZipMiddleware, minimum_size=COMPRESSION_MIN_BYTES)
+
+# History and job files live under DATA_DIR (default: data/ next to this file)
+DATA_DIR = Path(os.getenv("DATA_DIR") or Path(__file__).resolve().parent / "data")
+
 # Persistent history store
-history_store = HistoryStore(Path(__file__).resolve().parent / "data" / "history.jsonl")
+history_store = HistoryStore(DATA_DIR / "history.jsonl")
+
+# EXPLAIN plans per query fingerprint, rebuilt from history on startup
+PLAN_TRACKING = os.getenv("PLAN_TRACKING", "false").lower() == "true"
+plan_tracker = PlanTracker()
+
+# Near-duplicate lookup over previously optimized queries, kept current on every append
+similar_queries = SimilarQueryIndex()
+
+# Both indexes are rebuilt in a single streamed pass over the history file
+for history_entry in history_store.iter_entries():
+    plan_tracker.add_history_entry(history_entry)
+    similar_queries.add_history_entry(history_entry)
+history_store.add_listener(similar_queries.add_history_entry)
+
+# Large schema dumps are analyzed in parallel chunks of at most this many prompt tokens
+SCHEMA_CHUNK_TOKENS = int(os.getenv("SCHEMA_CHUNK_TOKENS", 3000))
+SCHEMA_ANALYSIS_WORKERS = int(os.getenv("SCHEMA_ANALYSIS_WORKERS", 4))
+# Chunk reports are merged in batches of at most this many prompt tokens
+SCHEMA_REDUCE_TOKENS = int(os.getenv("SCHEMA_REDUCE_TOKENS", 12000))
+
+# Optional storage statistics feed for the cost saver
+STORAGE_STATS_DB = os.getenv("STORAGE_STATS_DB")
+storage_stats_collector = None
+storage_stats_error = None
+if STORAGE_STATS_DB:
+    try:
+        storage_stats_collector = StorageStatsCollector(
+            STORAGE_STATS_DB,
+            interval_seconds=float(os.getenv("STORAGE_STATS_INTERVAL", 300)),
+        )
+    except ValueError as exc:
+        # A bad setting disables the feature instead of the whole API
+        storage_stats_error = str(exc)
+
+# Agent calls share LLM capacity across interactive, API and bulk traffic
+agent_scheduler = PriorityScheduler(
+    capacity=int(os.getenv("LLM_CONCURRENCY", 4)),
+    client_limit=int(os.getenv("CLIENT_CONCURRENCY", 2)),
+)
+# Priority classes are assigned server-side: API keys map to classes and the
+# bundled UI page issues a signed session cookie that marks its requests interactive
+caller_resolver = CallerResolver(
+    api_keys=parse_api_keys(os.getenv("PRIORITY_API_KEYS", "")),
+    trusted_proxies=parse_networks(os.getenv("TRUSTED_PROXIES", "")),
+    session_secret=os.getenv("UI_SESSION_SECRET") or None,
+)
+
+# Background jobs persist in SQLite so they survive restarts
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+# Callbacks go to public http(s) hosts only unless explicitly allowed (e.g. local development)
+JOB_CALLBACK_ALLOW_PRIVATE = os.getenv("JOB_CALLBACK_ALLOW_PRIVATE", "false").lower() == "true"
 
 # Serve frontend assets
 FRONTEND_DIR = Path(__file__).resolve().parent / "frontend"
@@ -38,6 +119,21 @@ else:
     initialization_error = None
 
 
+@app.on_event("startup")
+def start_background_collectors():
+    if storage_stats_collector:
+        storage_stats_collector.start()
+    if not initialization_error:
+        job_queue.start()
+
+
+@app.on_event("shutdown")
+def stop_background_collectors():
+    if storage_stats_collector:
+        storage_stats_collector.stop()
+    job_queue.stop()
+
+
 @app.get("/status")
 def status_check():
     if initialization_error:
@@ -46,18 +142,45 @@ def status_check():
 
 
 @app.get("/history")
-def recent_history(limit: int = 20):
+def recent_history(http_request: Request, response: Response, limit: int = 20, since_id: Optional[int] = None):
     if initialization_error:
         raise HTTPException(status_code=500, detail=initialization_error)
-    return {"entries": history_store.get_recent(limit=limit)}
+
+    # Validators come from in-memory append state, so unchanged polls never read the file.
+    summary = history_store.metrics()
+    if since_id is not None:
+        # An ID past the end means "caught up"; never echo one the store has not issued.
+        since_id = min(max(since_id, 0), summary["total_entries"])
+    etag = weak_etag("history", summary["total_entries"], summary["last_run_at"], limit, since_id)
+    last_modified = settled_last_modified(history_store.last_modified)
+    headers = validator_headers(etag, last_modified)
+    if is_not_modified(http_request.headers, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    if since_id is not None:
+        entries = history_store.get_since(since_id, limit=limit)
+    else:
+        entries = history_store.get_recent(limit=limit)
+    response.headers.update(headers)
+    return {"entries": entries, "last_id": entries[-1]["id"] if entries else since_id or 0}
 
 
 @app.get("/metrics")
-def service_metrics():
+def service_metrics(http_request: Request, response: Response):
     if initialization_error:
         raise HTTPException(status_code=500, detail=initialization_error)
+
     metrics = history_store.metrics()
+    scheduler_stats = agent_scheduler.stats()
+    # Job and scheduler state change without history appends, so they are part of the tag.
+    etag = weak_etag("metrics", metrics, job_queue.version, scheduler_stats)
+    headers = validator_headers(etag)
+    if is_not_modified(http_request.headers, etag):
+        return Response(status_code=304, headers=headers)
+
     metrics.update({
+        "jobs": job_queue.counts(),
+        "scheduler": scheduler_stats,
         "agents": {
             "query_optimizer": query_optimizer is not None,
             "schema_advisor": schema_advisor is not None,
@@ -65,8 +188,72 @@ def service_metrics():
             "data_validator": data_validator is not None,
         }
     })
+    response.headers.update(headers)
     return metrics
 
+
+@app.get("/storage-stats")
+def storage_stats():
+    if storage_stats_error:
+        raise HTTPException(status_code=503, detail=storage_stats_error)
+    if storage_stats_collector is None:
+        raise HTTPException(status_code=404, detail="Storage statistics are not configured (set STORAGE_STATS_DB).")
+    return {
+        "summary": storage_stats_collector.summary(),
+        "last_error": storage_stats_collector.last_error,
+    }
+
+
+def current_storage_stats() -> str:
+    """Return the latest compact storage summary for the cost saver prompt."""
+    if storage_stats_collector is None:
+        return ""
+    return storage_stats_collector.summary_text()
+
+@app.get("/plan-regressions")
+def plan_regressions(limit: int = 20):
+    if initialization_error:
+        raise HTTPException(status_code=500, detail=initialization_error)
+    return {"regressions": plan_tracker.regressions(limit=limit)}
+
+
+def capture_plan(sql_query: str) -> dict:
+    """EXPLAIN the query and record its plan; returns history fields to store."""
+    if not PLAN_TRACKING or not sql_query.strip().upper().startswith(EXPLAINABLE_PREFIXES):
+        return {}
+
+    explain_rows = execute_explain(sql_query)
+    if not explain_rows:
+        return {}
+
+    fingerprint = fingerprint_sql(sql_query)
+    plan = summarize_explain(explain_rows)
+    changes = plan_tracker.record(
+        fingerprint, sql_query.strip(), plan, datetime.now(timezone.utc).isoformat()
+    )
+    return {"fingerprint": fingerprint, "plan": plan, "plan_changes": changes}
+
+Caller = Tuple[str, str]
+
+
+def caller_for(http_request: Request) -> Caller:
+    """Return the (priority class, client id) a request is scheduled under."""
+    return caller_resolver.resolve(
+        http_request.headers,
+        http_request.cookies,
+        http_request.client.host if http_request.client else None,
+    )
+
+
+async def scheduled(caller: Caller, agent_call, *args, **kwargs):
+    """Run one agent call in the threadpool once the scheduler grants ``caller`` a slot.
+
+    Waiting happens on the event loop, so queued requests never tie up
+    server worker threads that higher-priority requests need.
+    """
+    async with agent_scheduler.async_slot(*caller):
+        return await run_in_threadpool(agent_call, *args, **kwargs)
+
 # Request models
 class QueryRequest(BaseModel):
     sql_query: str
@@ -74,6 +261,20 @@ class QueryRequest(BaseModel):
 class SchemaRequest(BaseModel):
     schema_sql: str
 
+class JobRequest(BaseModel):
+    kind: str = "analyze"
+    payload: Dict[str, Any]
+    callback_url: Optional[AnyHttpUrl] = None
+
+class WorkloadRequest(BaseModel):
+    queries: Optional[List[str]] = None
+    history_limit: int = 10000
+    existing_indexes: Dict[str, List[List[str]]] = {}
+    schema_sql: Optional[str] = None
+    database_indexes: bool = False
+    max_indexes: int = 10
+    narrate: bool = True
+
 
 def split_optimizer_output(raw_output: str) -> tuple[str, str]:
     """Split the optimizer response into SQL and rationale sections."""
@@ -98,9 +299,22 @@ def split_optimizer_output(raw_output: str) -> tuple[str, str]:
     return text, ""
 
 
+def agent_succeeded(raw_output: str, error_prefix: str) -> bool:
+    """Return ``False`` when an agent produced its error message (or nothing) instead of a report."""
+    return isinstance(raw_output, str) and bool(raw_output.strip()) and not raw_output.startswith(error_prefix)
+
+
+def optimization_succeeded(raw_output: str) -> bool:
+    """Return ``False`` when the optimizer produced its error message instead of a rewrite."""
+    return agent_succeeded(raw_output, QueryOptimizer.ERROR_PREFIX)
+
+
 @app.get("/")
 def root():
-    return FileResponse(FRONTEND_DIR / "index.html")
+    response = FileResponse(FRONTEND_DIR / "index.html")
+    # The UI's same-origin fetches carry this cookie, which schedules them as interactive
+    response.set_cookie(UI_SESSION_COOKIE, caller_resolver.issue_session(), httponly=True, samesite="strict")
+    return response
 
 
 @app.get("/favicon.ico")
@@ -121,19 +335,55 @@ def favicon():
     return Response(content=favicon_bytes, media_type="image/png")
 
 
+@app.post("/similar")
+def similar_past_results(request: QueryRequest, limit: int = 3):
+    if initialization_error:
+        raise HTTPException(status_code=500, detail=initialization_error)
+    return {"matches": similar_queries.query(request.sql_query, limit=limit)}
+
+
+def received_now() -> str:
+    """Arrival time recorded in history so replays keep the request spacing."""
+    return datetime.now(timezone.utc).isoformat()
+
+
 @app.post("/analyze")
-def analyze_query(request: QueryRequest):
+async def analyze_query(request: QueryRequest, http_request: Request):
     if initialization_error:
         raise HTTPException(status_code=500, detail=initialization_error)
+    return await run_analysis(request, caller_for(http_request))
 
-    optimized_text = query_optimizer.optimize_query(request.sql_query)
+
+async def run_analysis(request: QueryRequest, caller: Caller) -> dict:
+    """Run the full multi-agent analysis and record it in history."""
+    received_at = received_now()
+    similar = await run_in_threadpool(similar_queries.query, request.sql_query)
+    optimized_text = await scheduled(
+        caller, query_optimizer.optimize_query, request.sql_query, similar_examples=similar[:2]
+    )
     optimized_query, optimization_rationale = split_optimizer_output(optimized_text)
+    optimized = optimization_succeeded(optimized_text)
 
-    query_to_review = optimized_query if optimized_query else request.sql_query
+    query_to_review = optimized_query if optimized and optimized_query else request.sql_query
 
-    validation_report = data_validator.validate_query(query_to_review)
-    cost_estimation = cost_saver.save_cost({'sql_query': query_to_review})
-    schema_suggestions = schema_advisor.analyze_schema(query_to_review)
+    validation_report = await scheduled(caller, data_validator.validate_query, query_to_review)
+    cost_estimation = await scheduled(caller, cost_saver.save_cost, {
+        'sql_query': query_to_review,
+        'storage_stats': current_storage_stats(),
+    })
+    schema_suggestions = await scheduled(caller, schema_advisor.analyze_schema, query_to_review)
+
+    plan_fields = await run_in_threadpool(capture_plan, request.sql_query)
+    failed_agents = [
+        name
+        for name, output, error_prefix in (
+            ("query_optimizer", optimized_text, QueryOptimizer.ERROR_PREFIX),
+            ("data_validator", validation_report, DataValidator.ERROR_PREFIX),
+            ("cost_saver", cost_estimation, CostSaver.ERROR_PREFIX),
+            ("schema_advisor", schema_suggestions, SchemaAdvisor.ERROR_PREFIX),
+        )
+        if not agent_succeeded(output, error_prefix)
+    ]
 
     response_payload = {
         "original_query": request.sql_query.strip(),
@@ -142,53 +392,130 @@ def analyze_query(request: QueryRequest):
         "validation_report": validation_report,
         "cost_estimation": cost_estimation,
         "schema_suggestions": schema_suggestions,
+        "similar_queries": similar,
+        "failed_agents": failed_agents,
     }
+    if plan_fields:
+        response_payload["plan_changes"] = plan_fields["plan_changes"]
 
-    history_store.append({
+    await run_in_threadpool(history_store.append, {
         "type": "analysis",
+        "received_at": received_at,
         "request": request.dict(),
         "response": response_payload,
+        "optimized": optimized,
+        "fingerprint": plan_fields.get("fingerprint"),
+        "plan": plan_fields.get("plan"),
     })
 
     return response_payload
 
 
 @app.post("/optimize")
-def optimize_query(request: QueryRequest):
+async def optimize_query(request: QueryRequest, http_request: Request):
     if initialization_error:
         raise HTTPException(status_code=500, detail=initialization_error)
+    received_at = received_now()
 
-    optimized_query = query_optimizer.optimize_query(request.sql_query)
-    history_store.append({
+    similar = await run_in_threadpool(similar_queries.query, request.sql_query, limit=2)
+    optimized_query = await scheduled(
+        caller_for(http_request), query_optimizer.optimize_query, request.sql_query, similar_examples=similar
+    )
+    split_query, split_rationale = split_optimizer_output(optimized_query)
+    await run_in_threadpool(history_store.append, {
         "type": "optimize",
+        "received_at": received_at,
         "request": request.dict(),
-        "response": {"optimized_query": optimized_query},
+        "response": {"optimized_query": split_query, "optimization_rationale": split_rationale},
+        "optimized": optimization_succeeded(optimized_query),
     })
     return {"optimized_query": optimized_query}
 
 
 @app.post("/analyze-schema")
-def analyze_schema(request: SchemaRequest):
+async def analyze_schema(request: SchemaRequest, http_request: Request):
     if initialization_error:
         raise HTTPException(status_code=500, detail=initialization_error)
+    return await run_schema_analysis(request, caller_for(http_request))
+
 
-    schema_suggestions = schema_advisor.analyze_schema(request.schema_sql)
-    history_store.append({
+async def run_schema_analysis(request: SchemaRequest, caller: Caller) -> dict:
+    """Analyze a schema (chunked when large) and record it in history."""
+    received_at = received_now()
+    if estimate_tokens(request.schema_sql) <= SCHEMA_CHUNK_TOKENS:
+        schema_suggestions = await scheduled(caller, schema_advisor.analyze_schema, request.schema_sql)
+        response_payload = {
+            "schema_suggestions": schema_suggestions,
+            "failed_agents": [] if agent_succeeded(schema_suggestions, SchemaAdvisor.ERROR_PREFIX) else ["schema_advisor"],
+        }
+    else:
+        response_payload = await analyze_schema_in_chunks(request.schema_sql, caller)
+
+    await run_in_threadpool(history_store.append, {
         "type": "analyze_schema",
+        "received_at": received_at,
         "request": request.dict(),
-        "response": {"schema_suggestions": schema_suggestions},
+        "response": response_payload,
     })
-    return {"schema_suggestions": schema_suggestions}
+    return response_payload
+
+
+async def analyze_schema_in_chunks(schema_sql: str, caller: Caller) -> dict:
+    """Map chunks of a large dump through the schema advisor in parallel, then reduce."""
+    chunks, cross_table_findings = await run_in_threadpool(
+        build_chunks, schema_sql, token_budget=SCHEMA_CHUNK_TOKENS
+    )
+    workers = asyncio.Semaphore(max(1, SCHEMA_ANALYSIS_WORKERS))
+
+    async def review(chunk: str) -> str:
+        async with workers:
+            return await scheduled(caller, schema_advisor.analyze_schema, chunk, max_tokens=map_output_tokens(chunk))
+
+    chunk_reports = await asyncio.gather(*(review(chunk) for chunk in chunks))
+
+    async def merge(batch: List[str], findings: List[str], covered: int) -> str:
+        async with workers:
+            return await scheduled(
+                caller, schema_advisor.consolidate_reports, batch, findings, max_tokens=reduce_output_tokens(covered)
+            )
+
+    # Tree reduce: merge batches of reports until the rest fit one prompt.
+    reports, covered = list(chunk_reports), [1] * len(chunk_reports)
+    while len(reports) > 1 and estimate_tokens("\n\n".join(reports)) > SCHEMA_REDUCE_TOKENS:
+        batches = group_reports(reports, SCHEMA_REDUCE_TOKENS)
+        sizes, start = [], 0
+        for batch in batches:
+            sizes.append(sum(covered[start:start + len(batch)]))
+            start += len(batch)
+        reports = await asyncio.gather(*(merge(batch, [], size) for batch, size in zip(batches, sizes)))
+        covered = sizes
+
+    schema_suggestions = await merge(reports, cross_table_findings, len(chunk_reports))
+    failed_chunks = sum(not agent_succeeded(report, SchemaAdvisor.ERROR_PREFIX) for report in chunk_reports)
+    consolidated = agent_succeeded(schema_suggestions, SchemaAdvisor.CONSOLIDATION_ERROR_PREFIX)
+    return {
+        "schema_suggestions": schema_suggestions,
+        "chunk_count": len(chunks),
+        "cross_table_findings": cross_table_findings,
+        # A consolidation of nothing but error reports is not a result either
+        "failed_agents": [] if consolidated and failed_chunks < len(chunk_reports) else ["schema_advisor"],
+        "failed_chunks": failed_chunks,
+    }
 
 
 @app.post("/save-cost")
-def save_cost(request: QueryRequest):
+async def save_cost(request: QueryRequest, http_request: Request):
     if initialization_error:
         raise HTTPException(status_code=500, detail=initialization_error)
+    received_at = received_now()
 
-    cost_estimation = cost_saver.save_cost({'sql_query': request.sql_query})
-    history_store.append({
+    cost_estimation = await scheduled(caller_for(http_request), cost_saver.save_cost, {
+        'sql_query': request.sql_query,
+        'storage_stats': current_storage_stats(),
+    })
+    await run_in_threadpool(history_store.append, {
         "type": "save_cost",
+        "received_at": received_at,
         "request": request.dict(),
         "response": {"cost_estimation": cost_estimation},
     })
@@ -196,14 +523,140 @@ def save_cost(request: QueryRequest):
 
 
 @app.post("/validate-query")
-def validate_query(request: QueryRequest):
+async def validate_query(request: QueryRequest, http_request: Request):
     if initialization_error:
         raise HTTPException(status_code=500, detail=initialization_error)
+    received_at = received_now()
 
-    validation_report = data_validator.validate_query(request.sql_query)
-    history_store.append({
+    validation_report = await scheduled(caller_for(http_request), data_validator.validate_query, request.sql_query)
+    await run_in_threadpool(history_store.append, {
         "type": "validate_query",
+        "received_at": received_at,
         "request": request.dict(),
         "response": {"validation_report": validation_report},
     })
     return {"validation_report": validation_report}
+
+
+def history_queries(limit: int) -> List[str]:
+    """Return the SQL submitted in the most recent ``limit`` history entries."""
+    queries = []
+    for entry in history_store.get_recent(limit=limit):
+        sql_query = (entry.get("request") or {}).get("sql_query")
+        if sql_query:
+            queries.append(sql_query)
+    return queries
+
+
+def recommend_indexes(request: WorkloadRequest, queries: List[str]) -> dict:
+    """Run the workload index advisor over ``queries``."""
+    advisor = WorkloadIndexAdvisor(
+        max_indexes=request.max_indexes,
+        existing_indexes=request.existing_indexes,
+    )
+    if request.schema_sql:
+        advisor.add_schema(request.schema_sql)
+    if request.database_indexes:
+        advisor.add_index_statistics(execute_query(INDEX_STATISTICS_SQL) or [])
+    advisor.add_queries(queries)
+    return advisor.recommend()
+
+
+@app.post("/advise-indexes")
+async def advise_indexes(request: WorkloadRequest, http_request: Request):
+    if initialization_error:
+        raise HTTPException(status_code=500, detail=initialization_error)
+    received_at = received_now()
+
+    if request.queries is not None:
+        queries = request.queries
+    else:
+        queries = await run_in_threadpool(history_queries, request.history_limit)
+    index_plan = await run_in_threadpool(recommend_indexes, request, queries)
+
+    narrative = ""
+    if request.narrate and index_plan["indexes"]:
+        narrative = await scheduled(
+            caller_for(http_request), schema_advisor.review_index_plan, format_index_plan(index_plan)
+        )
+
+    response_payload = {"index_plan": index_plan, "schema_suggestions": narrative}
+    await run_in_threadpool(history_store.append, {
+        "type": "advise_indexes",
+        "received_at": received_at,
+        "request": {"query_count": len(queries), "source": "upload" if request.queries is not None else "history"},
+        "response": response_payload,
+    })
+    return response_payload
+
+
+# Long analyses can run as durable background jobs
+JOB_REQUEST_MODELS = {"analyze": QueryRequest, "analyze_schema": SchemaRequest}
+JOB_AGENT_COUNTS = {"analyze": 4, "analyze_schema": 1}
+
+
+def job_outcome(kind: str, result: dict) -> dict:
+    """Return ``result``, or raise ``JobFailed`` when agents returned error messages.
+
+    The job is ``failed`` when every agent failed and ``degraded`` when only
+    some did (or some schema chunks could not be reviewed); the partial result
+    is kept either way.
+    """
+    failed_agents = result.get("failed_agents") or []
+    if len(failed_agents) >= JOB_AGENT_COUNTS[kind]:
+        raise JobFailed(f"All agents failed: {', '.join(failed_agents)}", result)
+    if failed_agents:
+        raise JobFailed(f"Some agents failed: {', '.join(failed_agents)}", result, status="degraded")
+    if result.get("failed_chunks"):
+        raise JobFailed(f"{result['failed_chunks']} schema chunks failed", result, status="degraded")
+    return result
+
+
+job_queue = JobQueue(
+    DATA_DIR / "jobs.sqlite3",
+    handlers={
+        # Worker threads drive the async pipeline on their own event loop
+        "analyze": lambda payload: job_outcome("analyze", asyncio.run(run_analysis(
+            QueryRequest(**payload["request"]), ("bulk", payload["client_id"])
+        ))),
+        "analyze_schema": lambda payload: job_outcome("analyze_schema", asyncio.run(run_schema_analysis(
+            SchemaRequest(**payload["request"]), ("bulk", payload["client_id"])
+        ))),
+    },
+    workers=JOB_WORKERS,
+    callback_sender=partial(post_callback, allow_private=JOB_CALLBACK_ALLOW_PRIVATE),
+)
+
+
+@app.post("/jobs", status_code=202)
+def submit_job(request: JobRequest, http_request: Request):
+    if initialization_error:
+        raise HTTPException(status_code=500, detail=initialization_error)
+    if request.kind not in job_queue.handlers:
+        raise HTTPException(status_code=400, detail=f"Unknown job kind: {request.kind}")
+    try:
+        JOB_REQUEST_MODELS[request.kind](**request.payload)
+    except ValidationError as exc:
+        raise HTTPException(status_code=422, detail=exc.errors())
+    callback_url = str(request.callback_url) if request.callback_url else None
+    if callback_url:
+        try:
+            validate_callback_url(callback_url, allow_private=JOB_CALLBACK_ALLOW_PRIVATE)
+        except ValueError as exc:
+            raise HTTPException(status_code=422, detail=str(exc))
+
+    _, client_id = caller_for(http_request)
+    job_id = job_queue.submit(
+        request.kind,
+        {"request": request.payload, "client_id": client_id},
+        callback_url=callback_url,
+    )
+    return {"job_id": job_id, "status": "queued"}
+
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
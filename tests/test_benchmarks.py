@@ -0,0 +1,54 @@
+"""Tests for the benchmark harness helpers."""
+
+from __future__ import annotations
+
+import pytest
+
+from benchmarks.fake_llm import FakeLLMError, LatencyModel, fake_anthropic_factory
+from benchmarks.run import best_of, compare_results
+
+
+def test_fake_client_returns_canned_text_and_injects_errors():
+    client = fake_anthropic_factory(LatencyModel(error_rate=1.0), response_text="ok")(api_key="x")
+    with pytest.raises(FakeLLMError):
+        client.messages.create(model="m", messages=[])
+
+    client = fake_anthropic_factory(LatencyModel(), response_text="ok")(api_key="x")
+    assert client.messages.create(model="m", messages=[]).content[0].text == "ok"
+
+
+def test_latency_model_distributions():
+    assert LatencyModel(mean_ms=5).sample() == pytest.approx(0.005)
+    uniform = [LatencyModel(mean_ms=10, distribution="uniform", jitter_ms=5, seed=n).sample() for n in range(50)]
+    assert all(0.005 <= value <= 0.015 for value in uniform)
+    assert LatencyModel(mean_ms=10, distribution="lognormal").sample() > 0
+    with pytest.raises(ValueError):
+        LatencyModel(distribution="pareto")
+
+
+def test_compare_results_flags_only_regressions_beyond_tolerance():
+    baseline = [
+        {"name": "latency", "value": 10.0, "unit": "ms", "better": "lower"},
+        {"name": "throughput", "value": 100.0, "unit": "ops/s", "better": "higher"},
+        {"name": "errors", "value": 0.0, "unit": "ratio", "better": "lower"},
+    ]
+    current = [
+        {"name": "latency", "value": 12.0, "unit": "ms", "better": "lower"},
+        {"name": "throughput", "value": 70.0, "unit": "ops/s", "better": "higher"},
+        {"name": "errors", "value": 0.005, "unit": "ratio", "better": "lower"},
+        {"name": "new_metric", "value": 1.0, "unit": "ms", "better": "lower"},
+    ]
+    regressions = compare_results(current, baseline, tolerance=0.25)
+    assert len(regressions) == 1
+    assert regressions[0].startswith("throughput:")
+
+
+def test_best_of_keeps_best_value_per_direction():
+    runs = [
+        [{"name": "latency", "value": 12.0, "unit": "ms", "better": "lower"},
+         {"name": "throughput", "value": 90.0, "unit": "ops/s", "better": "higher"}],
+        [{"name": "latency", "value": 10.0, "unit": "ms", "better": "lower"},
+         {"name": "throughput", "value": 80.0, "unit": "ops/s", "better": "higher"}],
+    ]
+    merged = {result["name"]: result["value"] for result in best_of(runs)}
+    assert merged == {"latency": 10.0, "throughput": 90.0}
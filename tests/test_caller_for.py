@@ -0,0 +1,74 @@
+"""Endpoint tests for how the API schedules callers."""
+
+from __future__ import annotations
+
+import importlib
+import os
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("anthropic")
+pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("CLAUDE_API_KEY", "test-key")
+
+import agents.base_agent as base_agent_module
+
+
+class _FakeMessages:
+    def create(self, **kwargs):
+        return SimpleNamespace(content=[SimpleNamespace(text="")])
+
+
+class _FakeAnthropic:
+    def __init__(self, api_key: str):
+        self.messages = _FakeMessages()
+
+
+base_agent_module.Anthropic = _FakeAnthropic
+
+main = importlib.import_module("main")
+
+
+@pytest.fixture()
+def seen(monkeypatch):
+    callers = []
+    original = main.caller_for
+
+    def recording(http_request):
+        caller = original(http_request)
+        callers.append(caller)
+        return caller
+
+    monkeypatch.setattr(main, "caller_for", recording)
+    monkeypatch.setattr(main.history_store, "append", lambda payload: None)
+    return callers
+
+
+def test_ui_page_session_is_scheduled_as_interactive(seen):
+    client = TestClient(main.app)
+    client.get("/")
+    client.post("/validate-query", json={"sql_query": "SELECT 1"})
+    assert seen[-1][0] == "interactive"
+
+
+def test_self_declared_interactive_without_session_is_api(seen):
+    client = TestClient(main.app)
+    client.post(
+        "/validate-query",
+        json={"sql_query": "SELECT 1"},
+        headers={"X-Priority-Class": "interactive", "X-Client-Id": "spoofed"},
+    )
+    priority, client_id = seen[-1]
+    assert priority == "api"
+    assert client_id != "spoofed"
+
+
+def test_callers_may_lower_their_class(seen):
+    client = TestClient(main.app)
+    client.post("/validate-query", json={"sql_query": "SELECT 1"}, headers={"X-Priority-Class": "bulk"})
+    assert seen[-1][0] == "bulk"
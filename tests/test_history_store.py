@@ -40,4 +40,85 @@ def test_metrics_reports_counts(temp_history: HistoryStore):
     metrics = temp_history.metrics()
     assert metrics["total_entries"] == 2
     assert metrics["first_run_at"] is not None
-    assert metrics["last_run_at"] is not None
\ No newline at end of file
+    assert metrics["last_run_at"] is not None
+
+def test_iter_entries_yields_all_in_order(temp_history: HistoryStore):
+    for idx in range(3):
+        temp_history.append({"type": "test", "payload": idx})
+
+    assert [entry["payload"] for entry in temp_history.iter_entries()] == [0, 1, 2]
+
+
+def test_listeners_receive_persisted_records(temp_history: HistoryStore):
+    received = []
+    temp_history.add_listener(received.append)
+    temp_history.append({"type": "test", "payload": 1})
+
+    assert len(received) == 1
+    assert received[0]["payload"] == 1
+    assert "timestamp" in received[0]
+
+
+def test_get_since_returns_only_newer_entries_with_ids(temp_history: HistoryStore):
+    for idx in range(5):
+        temp_history.append({"type": "test", "payload": idx})
+
+    assert [entry["id"] for entry in temp_history.get_recent(limit=2)] == [4, 5]
+    newer = temp_history.get_since(2, limit=2)
+    assert [(entry["id"], entry["payload"]) for entry in newer] == [(3, 2), (4, 3)]
+    assert temp_history.get_since(5) == []
+
+
+def test_sequence_and_metrics_survive_reopen(temp_history: HistoryStore):
+    assert temp_history.sequence == 0
+    assert temp_history.last_modified is None
+    temp_history.append({"type": "test", "payload": 1})
+    temp_history.append({"type": "test", "payload": 2})
+
+    reopened = HistoryStore(temp_history.storage_path)
+    assert reopened.sequence == 2
+    assert reopened.metrics() == temp_history.metrics()
+    assert reopened.last_modified == temp_history.last_modified
+
+    reopened.append({"type": "test", "payload": 3})
+    assert [entry["payload"] for entry in reopened.get_since(1)] == [2, 3]
+
+
+def test_unterminated_last_line_is_not_merged_with_next_append(tmp_path: Path):
+    path = tmp_path / "history.jsonl"
+    path.write_text('{"timestamp": "2024-01-01T00:00:00+00:00", "payload": 0}\n\n{"timestamp": "2024-01-02T00:00:00+00:00", "payload": 1}', encoding="utf-8")
+
+    store = HistoryStore(path)
+    store.append({"type": "test", "payload": 2})
+
+    assert [entry["payload"] for entry in store.get_recent(limit=10)] == [0, 1, 2]
+    assert [entry["id"] for entry in store.get_since(1)] == [2, 3]
+    assert store.metrics()["first_run_at"] == "2024-01-01T00:00:00+00:00"
+
+
+def test_truncated_last_line_is_skipped_instead_of_failing_startup(tmp_path: Path):
+    path = tmp_path / "history.jsonl"
+    path.write_text(
+        '{"timestamp": "2024-01-01T00:00:00+00:00", "payload": 0}\n'
+        '{"timestamp": "2024-01-02T00:00:00+00:00", "payload": 1}\n'
+        '{"timestamp": "2024-01-03T00:00:00+00:00", "payl',
+        encoding="utf-8",
+    )
+
+    store = HistoryStore(path)
+    assert store.metrics()["last_run_at"] == "2024-01-02T00:00:00+00:00"
+    assert [entry["payload"] for entry in store.iter_entries()] == [0, 1]
+
+    store.append({"type": "test", "payload": 3})
+    assert [(entry["id"], entry["payload"]) for entry in store.get_recent(limit=10)] == [(1, 0), (2, 1), (4, 3)]
+    assert [entry["id"] for entry in store.get_since(2)] == [4]
+
+
+def test_iter_entries_streams_a_snapshot_while_appends_continue(temp_history: HistoryStore):
+    for idx in range(3):
+        temp_history.append({"type": "test", "payload": idx})
+
+    entries = temp_history.iter_entries()
+    assert next(entries)["payload"] == 0
+    temp_history.append({"type": "test", "payload": 3})
+    assert [entry["payload"] for entry in entries] == [1, 2]
@@ -0,0 +1,71 @@
+"""Tests for the conditional GET helpers."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+from utils.http_cache import (
+    etag_matches,
+    http_date,
+    is_not_modified,
+    settled_last_modified,
+    validator_headers,
+    weak_etag,
+)
+
+
+def test_weak_etag_changes_with_its_inputs():
+    assert weak_etag("history", 3, 20).startswith('W/"')
+    assert weak_etag("history", 3, 20) == weak_etag("history", 3, 20)
+    assert weak_etag("history", 3, 20) != weak_etag("history", 4, 20)
+    assert weak_etag({"b": 1, "a": 2}) == weak_etag({"a": 2, "b": 1})
+
+
+def test_etag_matches_uses_weak_comparison_and_lists():
+    etag = 'W/"abc"'
+    assert etag_matches('"abc"', etag)
+    assert etag_matches('W/"zzz", W/"abc"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('W/"abd"', etag)
+
+
+def test_if_none_match_takes_precedence_over_if_modified_since():
+    modified = datetime(2024, 5, 1, 10, 0, 0, 500000, tzinfo=timezone.utc)
+    later = http_date(modified + timedelta(hours=1))
+
+    assert is_not_modified({"if-none-match": 'W/"abc"'}, 'W/"abc"', modified)
+    assert not is_not_modified({"if-none-match": 'W/"old"', "if-modified-since": later}, 'W/"abc"', modified)
+
+
+def test_if_modified_since_has_second_resolution():
+    modified = datetime(2024, 5, 1, 10, 0, 0, 500000, tzinfo=timezone.utc)
+    assert is_not_modified({"if-modified-since": http_date(modified)}, 'W/"abc"', modified)
+    earlier = http_date(modified - timedelta(seconds=1))
+    assert not is_not_modified({"if-modified-since": earlier}, 'W/"abc"', modified)
+    assert not is_not_modified({"if-modified-since": "garbage"}, 'W/"abc"', modified)
+    assert not is_not_modified({"if-modified-since": http_date(modified)}, 'W/"abc"', None)
+    assert not is_not_modified({}, 'W/"abc"', modified)
+
+
+def test_last_modified_is_withheld_during_its_own_second():
+    modified = datetime(2024, 5, 1, 10, 0, 0, 200000, tzinfo=timezone.utc)
+
+    # Another append at 10:00:00.700 would share the HTTP date, so no date yet.
+    assert settled_last_modified(modified, now=modified + timedelta(milliseconds=500)) is None
+    assert settled_last_modified(modified, now=modified + timedelta(milliseconds=800)) == modified
+    assert settled_last_modified(None) is None
+    assert not is_not_modified(
+        {"if-modified-since": http_date(modified)},
+        'W/"abc"',
+        settled_last_modified(modified, now=modified),
+    )
+
+
+def test_validator_headers():
+    modified = datetime(2024, 5, 1, 10, 0, tzinfo=timezone.utc)
+    assert validator_headers('W/"abc"', modified) == {
+        "ETag": 'W/"abc"',
+        "Cache-Control": "no-cache",
+        "Last-Modified": "Wed, 01 May 2024 10:00:00 GMT",
+    }
+    assert "Last-Modified" not in validator_headers('W/"abc"')
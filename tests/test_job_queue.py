@@ -0,0 +1,180 @@
+"""Tests for the SQLite-backed background job queue."""
+
+from __future__ import annotations
+
+import time
+from pathlib import Path
+
+import pytest
+
+from utils.job_queue import JobFailed, JobQueue, post_callback, validate_callback_url
+
+
+def _wait_for(queue: JobQueue, job_id: str, timeout: float = 5.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in ("succeeded", "degraded", "failed"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_workers_run_jobs_and_send_callbacks(tmp_path: Path):
+    callbacks = []
+    queue = JobQueue(
+        tmp_path / "jobs.sqlite3",
+        handlers={"echo": lambda payload: {"echo": payload["value"]}},
+        workers=2,
+        callback_sender=lambda url, body: callbacks.append((url, body)),
+    )
+    queue.start()
+    try:
+        job_id = queue.submit("echo", {"value": 42}, callback_url="http://example.test/hook")
+        job = _wait_for(queue, job_id)
+    finally:
+        queue.stop()
+
+    assert job["status"] == "succeeded"
+    assert job["result"] == {"echo": 42}
+    assert job["attempts"] == 1
+    assert callbacks[0][0] == "http://example.test/hook"
+    assert callbacks[0][1]["job_id"] == job_id
+
+
+def test_failures_and_callback_errors_are_recorded(tmp_path: Path):
+    def explode(payload):
+        raise RuntimeError("boom")
+
+    def refuse(url, body):
+        raise OSError("connection refused")
+
+    queue = JobQueue(tmp_path / "jobs.sqlite3", handlers={"explode": explode}, callback_sender=refuse)
+    job_id = queue.submit("explode", {}, callback_url="http://example.test/hook")
+    assert queue.run_once() is True
+    assert queue.run_once() is False
+
+    job = queue.get(job_id)
+    assert job["status"] == "failed"
+    assert job["error"] == "boom"
+    assert job["callback_error"] == "connection refused"
+    assert queue.counts() == {"failed": 1}
+
+
+def test_handlers_can_report_failed_or_degraded_results(tmp_path: Path):
+    def partial(payload):
+        raise JobFailed("Agents failed: " + payload["failed"], {"report": "..."}, status=payload["status"])
+
+    queue = JobQueue(tmp_path / "jobs.sqlite3", handlers={"partial": partial})
+    degraded = queue.submit("partial", {"failed": "cost_saver", "status": "degraded"})
+    failed = queue.submit("partial", {"failed": "all", "status": "failed"})
+    while queue.run_once():
+        pass
+
+    assert queue.get(degraded)["status"] == "degraded"
+    assert queue.get(degraded)["result"] == {"report": "..."}
+    assert queue.get(failed)["status"] == "failed"
+    assert queue.get(failed)["error"] == "Agents failed: all"
+    with pytest.raises(ValueError):
+        JobFailed("x", status="succeeded")
+
+
+def test_jobs_survive_restart(tmp_path: Path):
+    path = tmp_path / "jobs.sqlite3"
+    first = JobQueue(path, handlers={"echo": lambda payload: payload})
+    queued_id = first.submit("echo", {"n": 1})
+    interrupted_id = first.submit("echo", {"n": 2})
+    with first._lock:
+        first._connection.execute("UPDATE jobs SET status = 'running', attempts = 1 WHERE id = ?", (interrupted_id,))
+        first._connection.commit()
+
+    second = JobQueue(path, handlers={"echo": lambda payload: payload}, workers=1)
+    second.start()
+    try:
+        assert _wait_for(second, queued_id)["result"] == {"n": 1}
+        resumed = _wait_for(second, interrupted_id)
+    finally:
+        second.stop()
+    assert resumed["status"] == "succeeded"
+    assert resumed["attempts"] == 2
+
+
+def test_interrupted_jobs_fail_after_max_attempts(tmp_path: Path):
+    queue = JobQueue(tmp_path / "jobs.sqlite3", handlers={"echo": lambda payload: payload}, max_attempts=1)
+    job_id = queue.submit("echo", {})
+    with queue._lock:
+        queue._connection.execute("UPDATE jobs SET status = 'running', attempts = 1 WHERE id = ?", (job_id,))
+        queue._connection.commit()
+
+    queue._recover()
+    assert queue.get(job_id)["status"] == "failed"
+
+
+def test_submit_rejects_unknown_kind(tmp_path: Path):
+    queue = JobQueue(tmp_path / "jobs.sqlite3", handlers={})
+    with pytest.raises(ValueError):
+        queue.submit("missing", {})
+    assert queue.get("nope") is None
+
+
+def test_version_changes_with_job_state(tmp_path: Path):
+    queue = JobQueue(tmp_path / "jobs.sqlite3", handlers={"echo": lambda payload: payload})
+    versions = [queue.version]
+    queue.submit("echo", {"value": 1})
+    versions.append(queue.version)
+    assert queue.run_once()
+    versions.append(queue.version)
+
+    assert versions[0] < versions[1] < versions[2]
+    queue.counts()
+    assert queue.version == versions[2]
+
+
+def test_recover_leaves_jobs_with_live_heartbeat_alone(tmp_path: Path):
+    path = tmp_path / "jobs.sqlite3"
+    running = JobQueue(path, handlers={"echo": lambda payload: payload})
+    job_id = running.submit("echo", {})
+    row = running._claim()
+    assert row["id"] == job_id
+
+    second = JobQueue(path, handlers={"echo": lambda payload: payload})
+    second._recover()
+    assert second.get(job_id)["status"] == "running"
+    assert second.run_once() is False
+
+    stale = JobQueue(path, handlers={"echo": lambda payload: payload}, lease_seconds=0)
+    stale._recover()
+    assert stale.get(job_id)["status"] == "queued"
+
+
+def test_claim_skips_rows_taken_by_another_process(tmp_path: Path):
+    path = tmp_path / "jobs.sqlite3"
+    first = JobQueue(path, handlers={"echo": lambda payload: payload})
+    second = JobQueue(path, handlers={"echo": lambda payload: payload})
+    first_id = first.submit("echo", {"n": 1})
+    second_id = first.submit("echo", {"n": 2})
+
+    claimed = {first._claim()["id"], second._claim()["id"]}
+    assert claimed == {first_id, second_id}
+    assert first.get(first_id)["attempts"] == 1
+
+
+@pytest.mark.parametrize("url", [
+    "file:///etc/passwd",
+    "ftp://example.com/hook",
+    "http://127.0.0.1:8000/hook",
+    "http://169.254.169.254/latest/meta-data",
+    "http://10.0.0.5/hook",
+    "http://[::1]/hook",
+])
+def test_callback_urls_must_be_public_http(url: str):
+    with pytest.raises(ValueError):
+        validate_callback_url(url)
+    with pytest.raises(ValueError):
+        post_callback(url, {})
+
+
+def test_private_callbacks_can_be_allowed():
+    assert validate_callback_url("http://127.0.0.1:8000/hook", allow_private=True) == "http://127.0.0.1:8000/hook"
+    with pytest.raises(ValueError):
+        validate_callback_url("file:///etc/passwd", allow_private=True)
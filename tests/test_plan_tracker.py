@@ -0,0 +1,79 @@
+"""Tests for EXPLAIN plan normalisation and regression tracking."""
+
+from __future__ import annotations
+
+from utils.plan_tracker import PlanTracker, compare_plans, summarize_explain
+
+GOOD_PLAN_ROWS = [
+    {"id": 1, "table": "o", "type": "ref", "key": "idx_customer", "rows": 10, "Extra": "Using where"},
+    {"id": 1, "table": "c", "type": "eq_ref", "key": "PRIMARY", "rows": 1, "Extra": ""},
+]
+BAD_PLAN_ROWS = [
+    {"id": 1, "table": "o", "type": "ALL", "key": None, "rows": 50000, "Extra": "Using where; Using filesort"},
+    {"id": 1, "table": "c", "type": "eq_ref", "key": "PRIMARY", "rows": 1, "Extra": ""},
+]
+
+
+def test_summarize_explain_estimates_rows_examined():
+    plan = summarize_explain(GOOD_PLAN_ROWS)
+    assert plan["rows_examined"] == 10 + 10
+    assert plan["steps"][0] == {
+        "table": "o", "type": "ref", "key": "idx_customer", "rows": 10,
+        "filesort": False, "temporary": False,
+    }
+
+
+def test_summarize_explain_sums_separate_selects():
+    union = [
+        {"id": 1, "table": "a", "type": "ALL", "key": None, "rows": 10000, "Extra": ""},
+        {"id": 2, "table": "b", "type": "ALL", "key": None, "rows": 10000, "Extra": ""},
+        {"id": None, "table": "<union1,2>", "type": "ALL", "key": None, "rows": None, "Extra": "Using temporary"},
+    ]
+    assert summarize_explain(union)["rows_examined"] == 10000 + 10000 + 1
+
+
+def test_compare_plans_detects_regressions():
+    changes = compare_plans(summarize_explain(GOOD_PLAN_ROWS), summarize_explain(BAD_PLAN_ROWS))
+    assert "o: key changed from idx_customer to None" in changes
+    assert "o: access type degraded from ref to ALL" in changes
+    assert "o: new filesort" in changes
+    assert any(change.startswith("estimated rows examined grew") for change in changes)
+    assert compare_plans(summarize_explain(BAD_PLAN_ROWS), summarize_explain(GOOD_PLAN_ROWS)) == []
+
+
+def test_tracker_ranks_regressed_fingerprints():
+    tracker = PlanTracker()
+    small_bad = [dict(BAD_PLAN_ROWS[0], rows=500), BAD_PLAN_ROWS[1]]
+
+    assert tracker.record("a", "SELECT a", summarize_explain(GOOD_PLAN_ROWS)) == []
+    assert tracker.record("b", "SELECT b", summarize_explain(GOOD_PLAN_ROWS)) == []
+    assert tracker.record("c", "SELECT c", summarize_explain(GOOD_PLAN_ROWS)) == []
+    tracker.record("a", "SELECT a", summarize_explain(small_bad))
+    tracker.record("b", "SELECT b", summarize_explain(BAD_PLAN_ROWS))
+    tracker.record("c", "SELECT c", summarize_explain(GOOD_PLAN_ROWS))
+
+    assert [record["fingerprint"] for record in tracker.regressions()] == ["b", "a"]
+
+
+def test_tracker_load_replays_history_entries():
+    tracker = PlanTracker()
+    tracker.load([
+        {"type": "analysis", "fingerprint": "a", "plan": summarize_explain(GOOD_PLAN_ROWS), "request": {"sql_query": "q"}},
+        {"type": "optimize", "request": {"sql_query": "q"}},
+        {"type": "analysis", "fingerprint": "a", "plan": summarize_explain(BAD_PLAN_ROWS), "request": {"sql_query": "q"}},
+    ])
+    regressions = tracker.regressions()
+    assert len(regressions) == 1
+    assert regressions[0]["samples"] == 2
+
+
+def test_tracker_flags_gradual_row_growth_against_best_baseline():
+    tracker = PlanTracker()
+    rows = 100
+    changes = []
+    for _ in range(3):
+        plan = summarize_explain([{"id": 1, "table": "o", "type": "ref", "key": "idx", "rows": rows, "Extra": ""}])
+        changes = tracker.record("a", "SELECT a", plan)
+        rows = int(rows * 1.9)
+
+    assert any(change.startswith("estimated rows examined grew from 100") for change in changes)
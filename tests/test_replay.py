@@ -0,0 +1,131 @@
+"""Tests for the workload replayer."""
+
+from __future__ import annotations
+
+import json
+import threading
+
+from benchmarks.replay import load_workload, replay_closed_loop, replay_open_loop, summarize
+
+
+def _lines(*records):
+    return [json.dumps(record) for record in records]
+
+
+def test_load_workload_maps_history_entries_to_endpoints_and_offsets():
+    items = load_workload(_lines(
+        {"timestamp": "2024-05-01T10:00:00+00:00", "type": "analysis", "request": {"sql_query": "SELECT 1"}},
+        {"timestamp": "2024-05-01T10:00:02.500000+00:00", "type": "validate_query", "request": {"sql_query": "SELECT 2"}},
+        {"timestamp": "2024-05-01T10:00:03+00:00", "type": "advise_indexes", "request": {"query_count": 40, "source": "history"}},
+        {"timestamp": "2024-05-01T10:00:04+00:00", "type": "unknown", "request": {}},
+    ))
+
+    assert [(offset, kind, path) for offset, kind, _, path, _, _ in items] == [
+        (0.0, "analysis", "/analyze"),
+        (2.5, "validate_query", "/validate-query"),
+        (3.0, "advise_indexes", "/advise-indexes"),
+    ]
+    assert items[0][4] == {"sql_query": "SELECT 1"}
+    assert items[2][4] == {"history_limit": 40}
+
+
+def test_load_workload_spaces_history_by_arrival_time():
+    # The slow first request finished last but arrived first.
+    items = load_workload(_lines(
+        {"received_at": "2024-05-01T10:00:00+00:00", "timestamp": "2024-05-01T10:00:09+00:00", "type": "analysis", "request": {"sql_query": "SELECT 1"}},
+        {"received_at": "2024-05-01T10:00:01+00:00", "timestamp": "2024-05-01T10:00:02+00:00", "type": "validate_query", "request": {"sql_query": "SELECT 2"}},
+    ))
+    assert [(offset, kind) for offset, kind, _, _, _, _ in items] == [(0.0, "analysis"), (1.0, "validate_query")]
+
+
+def test_load_workload_reads_capture_records():
+    items = load_workload(_lines(
+        {"path": "metrics", "offset": 1.5},
+        {"endpoint": "/optimize", "body": {"sql_query": "SELECT 1"}, "offset": 0},
+        {"path": "/history?limit=5"},
+    ) + ["not json", ""])
+
+    assert [(offset, kind, method, path) for offset, kind, method, path, _, _ in items] == [
+        (0.0, "optimize", "POST", "/optimize"),
+        (0.0, "history", "GET", "/history?limit=5"),
+        (1.5, "metrics", "GET", "/metrics"),
+    ]
+
+
+def test_load_workload_keeps_recorded_callers_and_rotates_the_rest():
+    items = load_workload(_lines(
+        {"path": "/analyze", "body": {"sql_query": "SELECT 1"}, "offset": 0, "client_id": "ui-7", "priority": "interactive"},
+        {"path": "/analyze", "body": {"sql_query": "SELECT 2"}, "offset": 1, "headers": {"x-client-id": "etl", "X-Priority-Class": "bulk"}},
+        {"timestamp": "2024-05-01T10:00:02+00:00", "type": "analysis", "request": {"sql_query": "SELECT 3"}},
+        {"timestamp": "2024-05-01T10:00:03+00:00", "type": "analysis", "request": {"sql_query": "SELECT 4"}},
+        {"timestamp": "2024-05-01T10:00:04+00:00", "type": "analysis", "request": {"sql_query": "SELECT 5"}},
+    ), clients=2)
+
+    assert [item[5] for item in items] == [
+        {"X-Client-Id": "ui-7", "X-Priority-Class": "interactive"},
+        {"X-Client-Id": "etl", "X-Priority-Class": "bulk"},
+        {"X-Client-Id": "replay-0", "X-Priority-Class": "api"},
+        {"X-Client-Id": "replay-1", "X-Priority-Class": "api"},
+        {"X-Client-Id": "replay-0", "X-Priority-Class": "api"},
+    ]
+
+
+def test_open_loop_sends_on_schedule_and_times_from_due_time():
+    now = [0.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    items = [(0.0, "a", "GET", "/a", None, {}), (4.0, "b", "GET", "/b", None, {})]
+    outcomes, _ = replay_open_loop(items, lambda item: (200, None), speed=2.0, clock=lambda: now[0], sleep=sleep)
+
+    assert sleeps == [2.0]
+    assert sorted(kind for kind, *_ in outcomes) == ["a", "b"]
+
+    now[0] = 0.0
+    sleeps.clear()
+    replay_open_loop(items * 2, lambda item: (200, None), rate=4.0, clock=lambda: now[0], sleep=sleep)
+    assert sleeps == [0.25, 0.25, 0.25]
+
+
+def test_closed_loop_keeps_concurrency_requests_in_flight():
+    lock = threading.Lock()
+    active = [0]
+    peak = [0]
+    barrier = threading.Barrier(3, timeout=5)
+
+    def sender(item):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        if item[1] == "first":
+            barrier.wait()
+        with lock:
+            active[0] -= 1
+        return 200, None
+
+    items = [(0.0, "first", "GET", "/", None, {})] * 3 + [(0.0, "rest", "GET", "/", None, {})] * 6
+    outcomes, _ = replay_closed_loop(items, sender, concurrency=3)
+
+    assert len(outcomes) == 9
+    assert peak[0] == 3
+
+
+def test_summarize_reports_per_kind_error_rate_and_percentiles():
+    outcomes = [
+        ("analysis", 0.1, 200, None),
+        ("analysis", 0.3, 500, "HTTP 500"),
+        ("optimize", 0.2, 0, "connection refused"),
+        ("optimize", 0.4, 200, None),
+    ]
+    report = summarize(outcomes, elapsed=2.0)
+
+    assert list(report) == ["analysis", "optimize", "all"]
+    assert report["analysis"]["error_rate"] == 0.5
+    assert report["analysis"]["status_counts"] == {"200": 1, "500": 1}
+    assert report["all"]["requests"] == 4
+    assert report["all"]["throughput_rps"] == 2.0
+    assert report["all"]["latency_p50_ms"] == 300.0
+    assert report["optimize"]["latency_max_ms"] == 400.0
@@ -0,0 +1,56 @@
+"""Tests for server-side caller classification."""
+
+from __future__ import annotations
+
+import pytest
+
+from utils.request_identity import UI_SESSION_COOKIE, CallerResolver, client_address, parse_api_keys, parse_networks
+
+
+@pytest.fixture()
+def resolver():
+    return CallerResolver(
+        api_keys=parse_api_keys("ci:bulk:ci-secret, dash:interactive:dash-secret"),
+        trusted_proxies=parse_networks("10.0.0.0/8"),
+        session_secret="test-secret",
+    )
+
+
+def test_unlabeled_requests_are_api_and_cannot_raise_their_class(resolver):
+    assert resolver.resolve({}, {}, "203.0.113.5") == ("api", "203.0.113.5")
+    headers = {"x-priority-class": "interactive", "x-client-id": "spoofed"}
+    assert resolver.resolve(headers, {}, "203.0.113.5") == ("api", "203.0.113.5")
+    assert resolver.resolve({"x-priority-class": "bulk"}, {}, "203.0.113.5") == ("bulk", "203.0.113.5")
+
+
+def test_ui_session_cookie_marks_requests_interactive(resolver):
+    token = resolver.issue_session()
+    assert resolver.resolve({}, {UI_SESSION_COOKIE: token}, "198.51.100.7") == ("interactive", "198.51.100.7")
+
+    forged = token.split(".")[0] + ".deadbeef"
+    assert resolver.resolve({}, {UI_SESSION_COOKIE: forged}, "198.51.100.7")[0] == "api"
+    other = CallerResolver(session_secret="another-secret")
+    assert other.resolve({}, {UI_SESSION_COOKIE: token}, "198.51.100.7")[0] == "api"
+
+
+def test_api_keys_map_to_classes_and_may_name_sub_clients(resolver):
+    assert resolver.resolve({"x-api-key": "ci-secret"}, {}, "192.0.2.1") == ("bulk", "key:ci")
+    assert resolver.resolve(
+        {"x-api-key": "dash-secret", "x-client-id": "tenant-4"}, {}, "192.0.2.1"
+    ) == ("interactive", "key:dash/tenant-4")
+    assert resolver.resolve({"x-api-key": "wrong"}, {}, "192.0.2.1") == ("api", "192.0.2.1")
+
+
+def test_forwarded_for_is_only_read_from_trusted_proxies():
+    proxies = parse_networks("10.0.0.0/8")
+    assert client_address("10.0.0.2", "198.51.100.7", proxies) == "198.51.100.7"
+    # A client-supplied hop in front of the real one is ignored.
+    assert client_address("10.0.0.2", "1.2.3.4, 198.51.100.7, 10.0.0.9", proxies) == "198.51.100.7"
+    assert client_address("203.0.113.5", "198.51.100.7", proxies) == "203.0.113.5"
+    assert client_address(None, "198.51.100.7", proxies) == "anonymous"
+
+
+def test_parse_api_keys_rejects_unknown_classes():
+    with pytest.raises(ValueError):
+        parse_api_keys("ci:urgent:secret")
+    assert parse_api_keys("") == {}
@@ -0,0 +1,131 @@
+"""Tests for the weighted fair priority scheduler."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from utils.scheduler import PriorityScheduler
+
+
+def _run_contended(scheduler: PriorityScheduler, requests, hold: float = 0.002):
+    """Queue ``requests`` behind slots held at full capacity, then release them."""
+    order = []
+    order_lock = threading.Lock()
+    release = threading.Event()
+    held = threading.Semaphore(0)
+
+    def blocker(number):
+        with scheduler.slot("api", f"blocker-{number}"):
+            held.release()
+            release.wait()
+
+    def worker(priority, client_id):
+        with scheduler.slot(priority, client_id):
+            with order_lock:
+                order.append((priority, client_id))
+            time.sleep(hold)
+
+    threads = []
+    try:
+        for number in range(scheduler.capacity):
+            threads.append(threading.Thread(target=blocker, args=(number,)))
+            threads[-1].start()
+            held.acquire()
+        for priority, client_id in requests:
+            threads.append(threading.Thread(target=worker, args=(priority, client_id)))
+            threads[-1].start()
+        deadline = time.monotonic() + 5
+        while sum(stats["queued"] for stats in scheduler.stats()["classes"].values()) < len(requests):
+            assert time.monotonic() < deadline
+            time.sleep(0.001)
+    finally:
+        release.set()
+        for thread in threads:
+            thread.join(timeout=5)
+    return order
+
+
+def test_interactive_is_served_ahead_of_queued_bulk():
+    scheduler = PriorityScheduler(capacity=1, client_limit=10)
+    requests = [("bulk", f"ci-{n}") for n in range(6)] + [("interactive", "ui")]
+    order = _run_contended(scheduler, requests)
+    assert order.index(("interactive", "ui")) <= 1
+
+
+def test_weights_share_capacity_under_contention():
+    scheduler = PriorityScheduler(capacity=1, weights={"interactive": 4, "api": 2, "bulk": 1}, client_limit=100)
+    requests = [("bulk", f"b{n}") for n in range(8)] + [("api", f"a{n}") for n in range(8)]
+    order = _run_contended(scheduler, requests, hold=0)
+    first_six = [priority for priority, _ in order[:6]]
+    assert first_six.count("api") == 4
+    assert first_six.count("bulk") == 2
+
+
+def test_client_limit_lets_other_clients_through():
+    scheduler = PriorityScheduler(capacity=2, client_limit=1)
+    requests = [("bulk", "heavy"), ("bulk", "heavy"), ("bulk", "heavy"), ("bulk", "light")]
+    order = _run_contended(scheduler, requests)
+    assert order.index(("bulk", "light")) <= 1
+
+
+def test_client_limit_yields_idle_capacity_to_a_lone_client():
+    scheduler = PriorityScheduler(capacity=3, client_limit=1)
+    barrier = threading.Barrier(3, timeout=5)
+
+    def worker():
+        with scheduler.slot("bulk", "solo"):
+            barrier.wait()
+
+    threads = [threading.Thread(target=worker) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+    assert scheduler.stats()["classes"]["bulk"]["served"] == 3
+
+
+def test_async_slot_waits_on_the_loop_and_cleans_up_on_cancel():
+    scheduler = PriorityScheduler(capacity=1, client_limit=10)
+
+    async def scenario():
+        order = []
+
+        async def worker(priority, client_id):
+            async with scheduler.async_slot(priority, client_id):
+                order.append(priority)
+                await asyncio.sleep(0)
+
+        async with scheduler.async_slot("api", "blocker"):
+            bulk = asyncio.create_task(worker("bulk", "ci"))
+            abandoned = asyncio.create_task(worker("bulk", "gone"))
+            interactive = asyncio.create_task(worker("interactive", "ui"))
+            await asyncio.sleep(0.01)
+            assert scheduler.stats()["classes"]["bulk"]["queued"] == 2
+            abandoned.cancel()
+            await asyncio.sleep(0.01)
+            assert scheduler.stats()["classes"]["bulk"]["queued"] == 1
+        await asyncio.wait_for(asyncio.gather(bulk, interactive), timeout=5)
+        return order
+
+    assert asyncio.run(scenario()) == ["interactive", "bulk"]
+    stats = scheduler.stats()
+    assert stats["active"] == 0
+    assert sum(entry["queued"] for entry in stats["classes"].values()) == 0
+
+
+def test_stats_report_waits_and_reject_unknown_class():
+    scheduler = PriorityScheduler()
+    with scheduler.slot("interactive", "ui"):
+        stats = scheduler.stats()
+        assert stats["active"] == 1
+        assert stats["classes"]["interactive"]["active"] == 1
+    stats = scheduler.stats()["classes"]["interactive"]
+    assert stats["served"] == 1
+    assert stats["wait_p95_ms"] is not None
+    with pytest.raises(ValueError):
+        with scheduler.slot("urgent"):
+            pass
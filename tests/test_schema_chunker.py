@@ -0,0 +1,111 @@
+"""Tests for splitting large schema dumps into analysis chunks."""
+
+from __future__ import annotations
+
+from utils.schema_chunker import (
+    build_chunks,
+    estimate_tokens,
+    group_reports,
+    map_output_tokens,
+    parse_table,
+    reduce_output_tokens,
+    split_statements,
+)
+
+DUMP = """
+-- MariaDB dump
+DROP TABLE IF EXISTS `customers`;
+CREATE TABLE `customers` (
+  `id` int(11) unsigned NOT NULL AUTO_INCREMENT,
+  `email` varchar(255) NOT NULL DEFAULT 'x;y',
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `uq_email` (`email`)
+) ENGINE=InnoDB;
+CREATE TABLE `orders` (
+  `id` bigint NOT NULL,
+  `customer_id` int(11) NOT NULL,
+  `total` decimal(10,2),
+  PRIMARY KEY (`id`),
+  CONSTRAINT `fk_customer` FOREIGN KEY (`customer_id`) REFERENCES `customers` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB;
+CREATE TABLE `order_items` (
+  `order_id` bigint NOT NULL REFERENCES orders(id),
+  `sku` varchar(32) NOT NULL,
+  KEY `idx_order` (`order_id`, `sku`)
+) ENGINE=InnoDB;
+CREATE TABLE `audit_log` (`id` int PRIMARY KEY, `message` text);
+"""
+
+
+def test_split_statements_ignores_semicolons_in_strings_and_comments():
+    statements = split_statements("SELECT ';'; /* a; b */ SELECT 2; -- c;\nSELECT 3")
+    assert statements == ["SELECT ';';", "/* a; b */ SELECT 2;", "-- c;\nSELECT 3"]
+
+
+def test_parse_table_extracts_keys_and_foreign_keys():
+    orders = parse_table(split_statements(DUMP)[2])
+    assert orders["name"] == "orders"
+    assert orders["columns"]["customer_id"] == "int(11)"
+    assert orders["indexes"] == [{"columns": ["id"], "primary": True}]
+    assert orders["foreign_keys"] == [
+        {"columns": ["customer_id"], "references": "customers", "referenced_columns": ["id"]}
+    ]
+
+
+def test_build_chunks_keeps_fk_clusters_together_and_reports_gaps():
+    chunks, findings = build_chunks(DUMP, token_budget=10000)
+    assert len(chunks) == 1
+
+    cluster_tokens = sum(estimate_tokens(statement) for statement in split_statements(DUMP)[1:4])
+    chunks, findings = build_chunks(DUMP, token_budget=cluster_tokens)
+    assert len(chunks) == 2
+    assert all(name in chunks[0] for name in ("`customers`", "`orders`", "`order_items`"))
+    assert "audit_log" in chunks[1]
+    assert any(finding.startswith("FK index gap: orders(customer_id)") for finding in findings)
+    assert any("orders.customer_id is int but customers.id is int unsigned" in finding for finding in findings)
+    assert not any("order_items(order_id)" in finding and "index gap" in finding for finding in findings)
+
+
+def test_build_chunks_splits_oversized_clusters_per_table():
+    chunks, _ = build_chunks(DUMP, token_budget=1)
+    assert sum(chunk.count("CREATE TABLE") for chunk in chunks) == 4
+    assert all(chunk.count("CREATE TABLE") <= 1 for chunk in chunks)
+
+
+def test_parse_table_tolerates_truncated_foreign_key():
+    table = parse_table("CREATE TABLE t (id INT PRIMARY KEY, a INT, FOREIGN KEY (a) REFERENCES")
+    assert table["name"] == "t"
+    assert table["foreign_keys"] == []
+    assert build_chunks("CREATE TABLE t (a INT, FOREIGN KEY (a) REFERENCES")[0]
+
+
+def test_map_output_budget_scales_with_chunk_size():
+    assert map_output_tokens("CREATE TABLE t (id INT);") == 500
+    assert map_output_tokens("x" * int(3000 * 3.5)) == 1500
+    assert map_output_tokens("x" * 100000) == 2000
+
+
+def test_build_chunks_drops_dump_noise():
+    dump = (
+        "/*!40101 SET @OLD_CHARACTER_SET_CLIENT=@@CHARACTER_SET_CLIENT */;\n"
+        "SET NAMES utf8mb4;\n"
+        "LOCK TABLES `t` WRITE;\n"
+        "INSERT INTO `t` VALUES (1);\n"
+        "UNLOCK TABLES;\n" + DUMP + "ALTER TABLE `audit_log` ADD KEY `idx_message` (`message`(20));\n"
+    )
+    chunks, _ = build_chunks(dump, token_budget=100000)
+    assert len(chunks) == 1
+    assert "DROP TABLE" not in chunks[0]
+    assert "SET" not in chunks[0].replace("CHARACTER SET", "")
+    assert "INSERT" not in chunks[0] and "LOCK" not in chunks[0]
+    assert "ALTER TABLE `audit_log`" in chunks[0]
+
+
+def test_reports_are_grouped_for_a_tree_reduce():
+    reports = ["x" * 3500] * 5  # 1000 tokens each
+    assert [len(batch) for batch in group_reports(reports, token_budget=2500)] == [2, 2, 1]
+    # Oversized reports are still paired so every round shrinks the list.
+    assert [len(batch) for batch in group_reports(["x" * 35000] * 3, token_budget=2500)] == [2, 1]
+    assert reduce_output_tokens(1) == 1500
+    assert reduce_output_tokens(11) == 2500
+    assert reduce_output_tokens(50) == 4000
@@ -0,0 +1,97 @@
+"""Tests for the MinHash/LSH near-duplicate query index."""
+
+from __future__ import annotations
+
+import time
+
+from utils.history_store import HistoryStore
+from utils.similarity_index import SimilarQueryIndex
+
+BASE_QUERY = (
+    "SELECT o.id, o.total, c.name FROM orders o JOIN customers c ON o.customer_id = c.id "
+    "WHERE o.status = 'open' AND o.created_at >= '2024-01-01' ORDER BY o.created_at DESC"
+)
+
+
+def test_query_finds_variant_with_extra_column():
+    index = SimilarQueryIndex()
+    index.add(BASE_QUERY, "SELECT /* rewritten */ 1", "- Added covering index")
+    index.add("DELETE FROM sessions WHERE expires_at < NOW()", "DELETE ... LIMIT 1000")
+
+    matches = index.query(BASE_QUERY.replace("o.total,", "o.total, o.discount,"))
+    assert len(matches) == 1
+    assert matches[0]["optimized_query"] == "SELECT /* rewritten */ 1"
+    assert 0.5 <= matches[0]["similarity"] < 1.0
+    assert matches[0]["exact_shape"] is False
+
+
+def test_literal_variants_share_a_shape_and_latest_wins():
+    index = SimilarQueryIndex()
+    index.add("SELECT * FROM t WHERE id = 1", "first")
+    index.add("SELECT * FROM t WHERE id = 2", "second")
+
+    assert len(index) == 1
+    matches = index.query("SELECT * FROM t WHERE id = 99")
+    assert matches[0]["optimized_query"] == "second"
+    assert matches[0]["exact_shape"] is True
+
+
+def test_index_updates_incrementally_from_history(tmp_path):
+    store = HistoryStore(tmp_path / "history.jsonl")
+    index = SimilarQueryIndex()
+    store.add_listener(index.add_history_entry)
+
+    store.append({"type": "validate_query", "request": {"sql_query": BASE_QUERY}, "response": {}})
+    store.append({"type": "analysis", "request": {"sql_query": "SELECT 1"}, "response": {"optimized_query": "SELECT 1"}})
+    assert len(index) == 0
+
+    store.append({
+        "type": "analysis",
+        "request": {"sql_query": BASE_QUERY},
+        "response": {"optimized_query": "SELECT rewritten", "optimization_rationale": "- why"},
+    })
+    matches = index.query(BASE_QUERY)
+    assert matches[0]["optimization_rationale"] == "- why"
+    assert matches[0]["timestamp"] is not None
+
+
+def test_lookup_is_fast_with_many_entries():
+    index = SimilarQueryIndex()
+    for number in range(2000):
+        index.add(f"SELECT c{number % 40}, d FROM table_{number} WHERE k{number % 13} = 1 AND v > 2", "opt")
+
+    started = time.perf_counter()
+    matches = index.query("SELECT c7, d, e FROM table_7 WHERE k7 = 5 AND v > 9")
+    elapsed = time.perf_counter() - started
+    assert matches and matches[0]["sql_query"].startswith("SELECT c7, d FROM table_7")
+    assert elapsed < 0.5
+
+
+def test_failed_optimizations_do_not_replace_good_entries():
+    index = SimilarQueryIndex()
+    index.add_history_entry({
+        "type": "optimize",
+        "request": {"sql_query": BASE_QUERY},
+        "response": {"optimized_query": "SELECT rewritten", "optimization_rationale": "- why"},
+        "optimized": True,
+    })
+    index.add_history_entry({
+        "type": "analysis",
+        "request": {"sql_query": BASE_QUERY},
+        "response": {"optimized_query": "Error during optimization: overloaded"},
+        "optimized": False,
+    })
+    # Legacy entries without the flag.
+    index.add_history_entry({
+        "type": "optimize",
+        "request": {"sql_query": BASE_QUERY},
+        "response": {"optimized_query": "Error during optimization: timeout"},
+    })
+    index.add_history_entry({
+        "type": "optimize",
+        "request": {"sql_query": BASE_QUERY},
+        "response": {"optimized_query": "Optimized SQL Query:\nSELECT 2\n\nRationale:\n- raw"},
+    })
+
+    assert len(index) == 1
+    assert index.query(BASE_QUERY)[0]["optimized_query"] == "SELECT rewritten"
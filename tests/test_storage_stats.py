@@ -0,0 +1,116 @@
+"""Tests for the storage statistics collector using fixture snapshots."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from utils.storage_stats import (
+    StorageStatsCollector,
+    build_snapshot,
+    diff_snapshots,
+    summarize_snapshot,
+)
+
+MB = 1024 * 1024
+
+TABLE_ROWS = [
+    {"table_name": "orders", "engine": "InnoDB", "table_rows": 1000, "data_length": 80 * MB, "index_length": 20 * MB, "data_free": 50 * MB},
+    {"table_name": "users", "engine": "InnoDB", "table_rows": 50, "data_length": 1 * MB, "index_length": 1 * MB, "data_free": 0},
+]
+INDEX_USAGE_ROWS = [
+    {"table_name": "orders", "index_name": "PRIMARY", "count_read": 0, "count_write": 10},
+    {"table_name": "orders", "index_name": "idx_status", "count_read": 0, "count_write": 10},
+    {"table_name": "orders", "index_name": "idx_customer", "count_read": 42, "count_write": 10},
+    {"table_name": "orders", "index_name": "uq_reference", "count_read": 0, "count_write": 10},
+]
+INDEX_UNIQUENESS_ROWS = [
+    {"table_name": "orders", "index_name": "PRIMARY", "non_unique": 0},
+    {"table_name": "orders", "index_name": "idx_status", "non_unique": 1},
+    {"table_name": "orders", "index_name": "idx_customer", "non_unique": 1},
+    {"table_name": "orders", "index_name": "uq_reference", "non_unique": 0},
+]
+INDEX_SIZE_ROWS = [
+    {"table_name": "orders", "index_name": "idx_status", "index_bytes": 4 * MB},
+]
+
+
+def test_build_snapshot_computes_fragmentation():
+    snapshot = build_snapshot("shop", TABLE_ROWS, INDEX_USAGE_ROWS, INDEX_SIZE_ROWS, collected_at="t0")
+    assert snapshot["tables"]["orders"]["fragmentation"] == pytest.approx(50 / 150, abs=1e-4)
+    assert snapshot["tables"]["users"]["fragmentation"] == 0.0
+    assert snapshot["indexes"]["orders.idx_status"] == {"reads": 0, "writes": 10, "bytes": 4 * MB}
+
+
+def test_build_snapshot_without_performance_schema():
+    snapshot = build_snapshot("shop", TABLE_ROWS)
+    assert snapshot["indexes"] is None
+    assert summarize_snapshot(snapshot)["unused_indexes"] is None
+
+
+def test_summary_reports_unused_indexes_and_fragmentation():
+    snapshot = build_snapshot("shop", TABLE_ROWS, INDEX_USAGE_ROWS, INDEX_SIZE_ROWS, collected_at="t0")
+    summary = summarize_snapshot(snapshot)
+
+    assert summary["totals"]["data_bytes"] == 81 * MB
+    assert [entry["table"] for entry in summary["largest_tables"]] == ["orders", "users"]
+    assert [entry["table"] for entry in summary["fragmented_tables"]] == ["orders"]
+    assert [entry["index"] for entry in summary["unused_indexes"]] == ["orders.idx_status", "orders.uq_reference"]
+
+
+def test_summary_keeps_unique_indexes_and_reports_uptime():
+    snapshot = build_snapshot(
+        "shop", TABLE_ROWS, INDEX_USAGE_ROWS, INDEX_SIZE_ROWS,
+        collected_at="t0", index_uniqueness_rows=INDEX_UNIQUENESS_ROWS, uptime_seconds=3600,
+    )
+    assert snapshot["indexes"]["orders.uq_reference"]["unique"] is True
+    summary = summarize_snapshot(snapshot)
+    assert [entry["index"] for entry in summary["unused_indexes"]] == ["orders.idx_status"]
+    assert summary["server_uptime_seconds"] == 3600
+
+
+def test_diff_snapshots_only_reports_changes():
+    before = build_snapshot("shop", TABLE_ROWS, collected_at="t0")
+    grown = [dict(TABLE_ROWS[0], table_rows=1500, data_length=90 * MB), TABLE_ROWS[1]]
+    grown.append({"table_name": "audit", "table_rows": 1})
+    after = build_snapshot("shop", grown, collected_at="t1")
+
+    delta = diff_snapshots(before, after)
+    assert delta["since"] == "t0"
+    assert delta["tables"] == {"orders": {"rows": 500, "data_bytes": 10 * MB}}
+    assert delta["new_tables"] == ["audit"]
+    assert delta["dropped_tables"] == []
+
+
+def test_collector_uses_query_runner():
+    fixtures = {
+        "information_schema.TABLES": TABLE_ROWS,
+        "table_io_waits_summary_by_index_usage": INDEX_USAGE_ROWS,
+        "innodb_index_stats": None,
+        "information_schema.STATISTICS": INDEX_UNIQUENESS_ROWS,
+        "Uptime": [{"Variable_name": "Uptime", "Value": "86400"}],
+    }
+    executed = []
+
+    def runner(sql: str):
+        executed.append(sql)
+        for marker, rows in fixtures.items():
+            if marker in sql:
+                return rows
+        raise AssertionError(sql)
+
+    collector = StorageStatsCollector("shop", query_runner=runner)
+    assert collector.summary_text() == ""
+
+    collector.collect()
+    assert all("'shop'" in sql for sql in executed if "Uptime" not in sql)
+    summary = json.loads(collector.summary_text())
+    assert summary["database"] == "shop"
+    assert [entry["index"] for entry in summary["unused_indexes"]] == ["orders.idx_status"]
+    assert summary["server_uptime_seconds"] == 86400
+
+
+def test_collector_rejects_unsafe_database_name():
+    with pytest.raises(ValueError):
+        StorageStatsCollector("shop'; DROP TABLE x; --")
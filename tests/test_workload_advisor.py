@@ -0,0 +1,153 @@
+"""Tests for SQL normalisation and the workload index advisor."""
+
+from __future__ import annotations
+
+import time
+
+from utils.sql_parsing import fingerprint_sql, normalize_sql, tokenize
+from utils.workload_advisor import WorkloadIndexAdvisor, extract_features
+
+
+def test_normalize_sql_strips_literals_and_comments():
+    first = normalize_sql("SELECT a FROM t WHERE x IN (1, 2, 3) AND y = 'abc' -- note")
+    second = normalize_sql("select a  from t where x in (4,5) and y = \"z\";")
+    assert first == second == "SELECT a FROM t WHERE x IN (?+) AND y = ?"
+    assert fingerprint_sql("SELECT 1") == fingerprint_sql("SELECT 2")
+
+
+def test_extract_features_resolves_aliases():
+    features = extract_features(tokenize(
+        "SELECT o.id FROM orders o JOIN customers AS c ON o.customer_id = c.id "
+        "WHERE c.country = 'DE' AND o.created_at >= '2024-01-01' AND UPPER(o.note) = 'X' "
+        "ORDER BY o.created_at DESC"
+    ))
+    assert features.tables == ["orders", "customers"]
+    assert features.equality["customers"] == ["country"]
+    assert features.range["orders"] == ["created_at"]
+    assert features.join["orders"] == ["customer_id"]
+    assert features.order_by == [("orders", "created_at")]
+    assert "note" not in features.equality["orders"]
+
+
+def test_extract_features_ignores_leading_wildcard_like():
+    features = extract_features(tokenize("SELECT * FROM users WHERE email LIKE '%@x.com' AND name LIKE 'Jo%'"))
+    assert features.range["users"] == ["name"]
+
+
+def test_extract_features_skips_order_by_functions_and_direction():
+    features = extract_features(tokenize("SELECT * FROM t WHERE b = 1 ORDER BY LENGTH(name) DESC, id ASC"))
+    assert features.order_by == [("t", "id")]
+
+
+def test_extract_features_ignores_variables_and_boolean_literals():
+    features = extract_features(tokenize(
+        "SELECT * FROM orders WHERE customer_id = @cid AND flag = TRUE AND mode = @@sql_mode"
+    ))
+    assert features.equality["orders"] == ["customer_id", "flag", "mode"]
+    assert not features.join
+
+
+def test_recommend_quotes_identifiers_in_ddl():
+    advisor = WorkloadIndexAdvisor()
+    advisor.add_query("SELECT * FROM `order-lines` WHERE `group` = 1 ORDER BY LENGTH(name) DESC")
+    (index,) = advisor.recommend()["indexes"]
+    assert index["ddl"] == "CREATE INDEX `idx_order_lines_group` ON `order-lines` (`group`);"
+
+
+def test_recommend_prunes_prefix_redundant_indexes():
+    advisor = WorkloadIndexAdvisor()
+    advisor.add_queries(["SELECT * FROM orders WHERE status = 1"] * 5)
+    advisor.add_queries(["SELECT * FROM orders WHERE status = 2 AND customer_id = 9"] * 3)
+    advisor.add_queries(["SELECT * FROM orders WHERE status = 2 ORDER BY created_at"] * 2)
+
+    plan = advisor.recommend()
+    assert plan["queries_analyzed"] == 10
+    assert plan["distinct_shapes"] == 3
+    columns = [item["columns"] for item in plan["indexes"]]
+    assert ["status"] not in columns
+    assert all(item["columns"][0] == "status" for item in plan["indexes"])
+    assert sum(item["weight"] for item in plan["indexes"]) >= 10
+
+
+def test_recommend_skips_covered_and_reports_redundant_existing():
+    advisor = WorkloadIndexAdvisor(existing_indexes={"orders": [["status", "customer_id"], ["status"]]})
+    advisor.add_queries(["SELECT * FROM orders WHERE status = 1 AND customer_id = 2"] * 4)
+    plan = advisor.recommend()
+    assert plan["indexes"] == []
+    assert plan["redundant_existing_indexes"] == [{"table": "orders", "columns": ["status"]}]
+
+
+def test_recommend_scales_to_large_workloads():
+    queries = [
+        f"SELECT * FROM events WHERE account_id = {n} AND kind = 'k{n % 7}' AND created_at > '{n}'"
+        for n in range(20000)
+    ]
+    advisor = WorkloadIndexAdvisor()
+    started = time.perf_counter()
+    advisor.add_queries(queries)
+    plan = advisor.recommend()
+    assert time.perf_counter() - started < 10
+    assert plan["distinct_shapes"] == 1
+    assert plan["indexes"][0]["columns"] == ["account_id", "kind", "created_at"]
+
+
+def test_extract_features_keeps_unqualified_columns_in_joins():
+    features = extract_features(tokenize(
+        "SELECT * FROM orders o JOIN customers c ON o.customer_id = c.id WHERE status = 1 AND created_at > 3"
+    ))
+    assert features.equality["orders"] == ["status"]
+    assert features.range["orders"] == ["created_at"]
+
+    described = extract_features(
+        tokenize("SELECT * FROM orders o JOIN customers c ON o.customer_id = c.id WHERE country = 'DE'"),
+        table_columns={"orders": {"id", "customer_id"}, "customers": {"id", "country"}},
+    )
+    assert described.equality == {"customers": ["country"]}
+
+
+def test_extract_features_scopes_subqueries():
+    features = extract_features(tokenize(
+        "SELECT * FROM orders WHERE status = 1 AND id IN (SELECT order_id FROM items WHERE sku = 2)"
+    ))
+    assert features.equality["orders"] == ["status", "id"]
+    assert features.equality["items"] == ["sku"]
+
+
+def test_extract_features_does_not_treat_ctes_as_tables():
+    features = extract_features(tokenize(
+        "WITH recent (id, total) AS (SELECT id, total FROM orders WHERE status = 1) "
+        "SELECT * FROM recent r WHERE r.id = 3"
+    ))
+    assert features.tables == ["orders"]
+    assert dict(features.equality) == {"orders": ["status"]}
+
+
+def test_extract_features_skips_or_predicates():
+    features = extract_features(tokenize("SELECT * FROM t WHERE c = 5 AND (a = 1 OR b = 2)"))
+    assert dict(features.equality) == {"t": ["c"]}
+    assert not extract_features(tokenize("SELECT * FROM t WHERE a = 1 OR b = 2")).equality
+
+
+def test_recommend_skips_primary_keys_from_ddl_and_by_convention():
+    query = "SELECT * FROM orders o JOIN customers c ON o.customer_id = c.customer_no WHERE o.status = 1"
+
+    advisor = WorkloadIndexAdvisor()
+    advisor.add_query("SELECT * FROM orders o JOIN customers c ON o.customer_id = c.id WHERE o.status = 1")
+    assert [item["table"] for item in advisor.recommend()["indexes"]] == ["orders"]
+
+    advisor = WorkloadIndexAdvisor()
+    advisor.add_schema(
+        "CREATE TABLE customers (customer_no INT NOT NULL, name VARCHAR(20), PRIMARY KEY (customer_no));\n"
+        "CREATE TABLE orders (id INT PRIMARY KEY, customer_id INT, status INT);\n"
+        "CREATE INDEX idx_status_customer ON orders (status, customer_id);"
+    )
+    advisor.add_query(query)
+    assert advisor.existing_indexes == {"customers": [("customer_no",)], "orders": [("id",), ("status", "customer_id")]}
+    assert advisor.recommend()["indexes"] == []
+
+    advisor = WorkloadIndexAdvisor()
+    advisor.add_index_statistics([
+        {"TABLE_NAME": "customers", "INDEX_NAME": "PRIMARY", "SEQ_IN_INDEX": 1, "COLUMN_NAME": "customer_no"},
+    ])
+    advisor.add_query(query)
+    assert "customers" not in [item["table"] for item in advisor.recommend()["indexes"]]
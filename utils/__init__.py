@@ -1,3 +1,9 @@
 from .history_store import HistoryStore
+from .job_queue import JobQueue
+from .plan_tracker import PlanTracker
+from .scheduler import PriorityScheduler
+from .similarity_index import SimilarQueryIndex
+from .storage_stats import StorageStatsCollector
+from .workload_advisor import WorkloadIndexAdvisor
 
-__all__ = ["HistoryStore"]
\ No newline at end of file
+__all__ = ["HistoryStore", "JobQueue", "PlanTracker", "PriorityScheduler", "SimilarQueryIndex", "StorageStatsCollector", "WorkloadIndexAdvisor"]
\ No newline at end of file
@@ -6,18 +6,89 @@ import json
 import threading
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
 
 
 class HistoryStore:
-    """Append-only JSONL store that captures query analysis history."""
+    """Append-only JSONL store that captures query analysis history.
+
+    Entries are identified by their 1-based position in the file. The byte
+    offset of every entry, the entry count and the first/last timestamps are
+    kept in memory, so ``metrics()`` and change checks never read the file
+    and ``get_recent()``/``get_since()`` only read the lines they return.
+    Lines that do not decode (e.g. a write cut off by a crash) keep their
+    position but are skipped when reading.
+    """
 
     def __init__(self, storage_path: Path) -> None:
         self.storage_path = storage_path
         self._lock = threading.Lock()
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._offsets: List[int] = []
+        self._end = 0
+        self._first_timestamp: Optional[str] = None
+        self._last_timestamp: Optional[str] = None
         self.storage_path.parent.mkdir(parents=True, exist_ok=True)
         if not self.storage_path.exists():
             self.storage_path.write_text("", encoding="utf-8")
+        self._index()
+
+    @staticmethod
+    def _decode(raw: bytes) -> Optional[Dict[str, Any]]:
+        """Parse one stored line, or ``None`` if it is truncated or not an entry."""
+        try:
+            record = json.loads(raw)
+        except ValueError:
+            return None
+        return record if isinstance(record, dict) else None
+
+    def _index(self) -> None:
+        """Record the offset of every non-blank line and the boundary timestamps."""
+        with self.storage_path.open("rb") as handle:
+            offset = 0
+            for raw in handle:
+                if raw.strip():
+                    self._offsets.append(offset)
+                offset += len(raw)
+            self._end = offset
+        self._first_timestamp = self._boundary_timestamp(self._offsets)
+        self._last_timestamp = self._boundary_timestamp(reversed(self._offsets))
+        if self._end and not self._ends_with_newline():
+            # Keep the next append on its own line after an unterminated tail.
+            with self.storage_path.open("ab") as handle:
+                handle.write(b"\n")
+            self._end += 1
+
+    def _boundary_timestamp(self, offsets: Iterable[int]) -> Optional[str]:
+        """Timestamp of the first decodable line among ``offsets``."""
+        with self.storage_path.open("rb") as handle:
+            for offset in offsets:
+                handle.seek(offset)
+                record = self._decode(handle.readline())
+                if record is not None:
+                    return record.get("timestamp")
+        return None
+
+    def _ends_with_newline(self) -> bool:
+        with self.storage_path.open("rb") as handle:
+            handle.seek(self._end - 1)
+            return handle.read(1) == b"\n"
+
+    def add_listener(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        """Call ``callback`` with every record after it has been persisted."""
+        self._listeners.append(callback)
+
+    @property
+    def sequence(self) -> int:
+        """Number of entries appended so far; changes exactly when the history does."""
+        return len(self._offsets)
+
+    @property
+    def last_modified(self) -> Optional[datetime]:
+        """Timestamp of the most recent entry, or ``None`` when empty."""
+        if not self._last_timestamp:
+            return None
+        return datetime.fromisoformat(self._last_timestamp)
 
     def append(self, payload: Dict[str, Any]) -> None:
         """Persist a new analysis entry with a UTC timestamp."""
@@ -25,51 +96,90 @@ class HistoryStore:
             "timestamp": datetime.now(timezone.utc).isoformat(),
             **payload,
         }
-        line = json.dumps(record, ensure_ascii=False)
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
         with self._lock:
-            with self.storage_path.open("a", encoding="utf-8") as handle:
-                handle.write(line + "\n")
+            with self.storage_path.open("ab") as handle:
+                handle.write(line)
+            self._offsets.append(self._end)
+            self._end += len(line)
+            if self._first_timestamp is None:
+                self._first_timestamp = record["timestamp"]
+            self._last_timestamp = record["timestamp"]
+
+        for callback in self._listeners:
+            callback(record)
+
+    def _read_range(self, start: int, stop: int) -> bytes:
+        """Read the raw bytes of entries ``start`` (0-based, inclusive) to ``stop`` (exclusive).
+
+        Called under the lock; callers decode with ``_parse_range`` after releasing it.
+        """
+        if start >= stop:
+            return b""
+        end = self._offsets[stop] if stop < len(self._offsets) else self._end
+        with self.storage_path.open("rb") as handle:
+            handle.seek(self._offsets[start])
+            return handle.read(end - self._offsets[start])
+
+    def _parse_range(self, start: int, chunk: bytes) -> List[Dict[str, Any]]:
+        lines = [line for line in chunk.split(b"\n") if line.strip()]
+        entries = []
+        for number, line in enumerate(lines):
+            record = self._decode(line)
+            if record is not None:
+                entries.append({**record, "id": start + number + 1})
+        return entries
 
     def get_recent(self, limit: int = 20) -> List[Dict[str, Any]]:
         """Return the most recent history entries, newest last."""
-        if limit <= 0 or not self.storage_path.exists():
+        if limit <= 0:
             return []
 
         with self._lock:
-            with self.storage_path.open("r", encoding="utf-8") as handle:
-                lines = [line.strip() for line in handle if line.strip()]
+            total = len(self._offsets)
+            start = max(total - limit, 0)
+            chunk = self._read_range(start, total)
+        return self._parse_range(start, chunk)
+
+    def get_since(self, since_id: int, limit: int = 100) -> List[Dict[str, Any]]:
+        """Return up to ``limit`` entries with an ``id`` greater than ``since_id``, oldest first."""
+        if limit <= 0:
+            return []
 
-        recent_lines = lines[-limit:]
-        return [json.loads(line) for line in recent_lines]
+        start = max(since_id, 0)
+        with self._lock:
+            chunk = self._read_range(start, min(start + limit, len(self._offsets)))
+        return self._parse_range(start, chunk)
 
-    def metrics(self) -> Dict[str, Any]:
-        """Return aggregate statistics about stored analyses."""
-        if not self.storage_path.exists():
-            return {
-                "total_entries": 0,
-                "first_run_at": None,
-                "last_run_at": None,
-            }
+    def iter_entries(self) -> Iterator[Dict[str, Any]]:
+        """Yield every stored entry, oldest first, reading one line at a time.
 
+        Only the current end of the file is taken under the lock; the file is
+        append-only, so everything before it can be streamed while other
+        requests keep appending.
+        """
         with self._lock:
-            with self.storage_path.open("r", encoding="utf-8") as handle:
-                lines = [line.strip() for line in handle if line.strip()]
+            end = self._end
+
+        with self.storage_path.open("rb") as handle:
+            position = 0
+            for raw in handle:
+                position += len(raw)
+                if position > end:
+                    return
+                if raw.strip():
+                    record = self._decode(raw)
+                    if record is not None:
+                        yield record
 
-        if not lines:
+    def metrics(self) -> Dict[str, Any]:
+        """Return aggregate statistics about stored analyses."""
+        with self._lock:
             return {
-                "total_entries": 0,
-                "first_run_at": None,
-                "last_run_at": None,
+                "total_entries": len(self._offsets),
+                "first_run_at": self._first_timestamp,
+                "last_run_at": self._last_timestamp,
             }
 
-        first_entry = json.loads(lines[0])
-        last_entry = json.loads(lines[-1])
-
-        return {
-            "total_entries": len(lines),
-            "first_run_at": first_entry.get("timestamp"),
-            "last_run_at": last_entry.get("timestamp"),
-        }
-
 
-__all__ = ["HistoryStore"]
\ No newline at end of file
+__all__ = ["HistoryStore"]
@@ -0,0 +1,89 @@
+"""Validators for conditional GET (``ETag``/``Last-Modified``) on polled endpoints."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Mapping, Optional
+
+
+def weak_etag(*parts: Any) -> str:
+    """Build a weak ETag from values that change whenever the representation does."""
+    digest = hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    return f'W/"{digest[:20]}"'
+
+
+def http_date(moment: datetime) -> str:
+    """Format ``moment`` as an RFC 7231 HTTP-date."""
+    return format_datetime(moment.astimezone(timezone.utc), usegmt=True)
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def settled_last_modified(
+    last_modified: Optional[datetime],
+    now: Optional[datetime] = None,
+) -> Optional[datetime]:
+    """Return ``last_modified`` only once its second has passed, else ``None``.
+
+    HTTP dates have one-second resolution, so a date from the current second
+    cannot distinguish a later change in that same second. Leaving it out of
+    both the response and the ``If-Modified-Since`` check makes such
+    requests fall back to the ``ETag``.
+    """
+    if last_modified is None:
+        return None
+    now = now or datetime.now(timezone.utc)
+    if last_modified.replace(microsecond=0) >= now.replace(microsecond=0):
+        return None
+    return last_modified
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of ``etag`` against an ``If-None-Match`` header value."""
+    if if_none_match.strip() == "*":
+        return True
+    return any(_opaque(candidate) == _opaque(etag) for candidate in if_none_match.split(","))
+
+
+def is_not_modified(
+    headers: Mapping[str, str],
+    etag: str,
+    last_modified: Optional[datetime] = None,
+) -> bool:
+    """Return ``True`` when the request's validators show the client copy is current.
+
+    ``If-None-Match`` takes precedence; ``If-Modified-Since`` is only consulted
+    when it is absent and ``last_modified`` is known.
+    """
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # HTTP dates have one-second resolution.
+    return last_modified.replace(microsecond=0) <= since
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime] = None) -> Dict[str, str]:
+    """Response headers that let clients revalidate instead of re-downloading."""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+__all__ = ["etag_matches", "http_date", "is_not_modified", "settled_last_modified", "validator_headers", "weak_etag"]
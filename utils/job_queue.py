@@ -0,0 +1,327 @@
+"""Durable background job queue backed by SQLite."""
+
+from __future__ import annotations
+
+import ipaddress
+import json
+import socket
+import sqlite3
+import threading
+import urllib.parse
+import urllib.request
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+JobHandler = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    callback_url TEXT,
+    callback_error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT,
+    owner TEXT,
+    heartbeat_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs (status, created_at);
+"""
+
+# Columns added after the first release, for databases created before them.
+_ADDED_COLUMNS = {"owner": "TEXT", "heartbeat_at": "TEXT"}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def validate_callback_url(url: str, allow_private: bool = False) -> str:
+    """Return ``url`` if it is a safe callback target, else raise ``ValueError``.
+
+    Only http(s) URLs are accepted, and unless ``allow_private`` is set every
+    address the host resolves to must be public, so callbacks cannot be
+    pointed at loopback, link-local (cloud metadata) or internal networks.
+    """
+    parsed = urllib.parse.urlsplit(url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise ValueError("Callback URL must be an absolute http or https URL")
+    if allow_private:
+        return url
+    try:
+        port = parsed.port or (443 if parsed.scheme == "https" else 80)
+        addresses = {info[4][0] for info in socket.getaddrinfo(parsed.hostname, port, proto=socket.IPPROTO_TCP)}
+    except (OSError, ValueError) as exc:
+        raise ValueError(f"Callback host cannot be resolved: {parsed.hostname}") from exc
+    for address in addresses:
+        if not ipaddress.ip_address(address.split("%", 1)[0]).is_global:
+            raise ValueError(f"Callback host resolves to a non-public address: {parsed.hostname}")
+    return url
+
+
+class JobFailed(Exception):
+    """Raised by a handler whose work ran but did not (fully) succeed.
+
+    Unlike other exceptions the partial ``result`` is still stored. ``status``
+    is ``"failed"`` when nothing usable was produced and ``"degraded"`` when
+    only part of the work failed.
+    """
+
+    def __init__(self, error: str, result: Optional[Dict[str, Any]] = None, status: str = "failed") -> None:
+        if status not in ("failed", "degraded"):
+            raise ValueError(f"Unknown job failure status: {status!r}")
+        super().__init__(error)
+        self.result = result
+        self.status = status
+
+
+class _RefuseRedirects(urllib.request.HTTPRedirectHandler):
+    """Treat redirects as errors so a callback cannot be bounced to another host."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+_callback_opener = urllib.request.build_opener(_RefuseRedirects)
+
+
+def post_callback(url: str, body: Dict[str, Any], timeout: float = 10.0, allow_private: bool = False) -> None:
+    """POST ``body`` as JSON to ``url``; raises on invalid targets, network or HTTP errors."""
+    # Re-checked at send time because DNS may have changed since submission.
+    validate_callback_url(url, allow_private=allow_private)
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(body, ensure_ascii=False).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with _callback_opener.open(request, timeout=timeout):
+        pass
+
+
+class JobQueue:
+    """Persist jobs in SQLite and run them on a pool of worker threads.
+
+    Running jobs carry the owning queue's ID and a heartbeat refreshed every
+    ``lease_seconds / 3``. Only jobs whose heartbeat is older than
+    ``lease_seconds`` (their process stopped) are put back in the queue, up
+    to ``max_attempts`` tries each, so several processes can share one file.
+    """
+
+    def __init__(
+        self,
+        storage_path: Path,
+        handlers: Dict[str, JobHandler],
+        workers: int = 2,
+        max_attempts: int = 3,
+        callback_sender: Callable[[str, Dict[str, Any]], None] = post_callback,
+        lease_seconds: float = 60.0,
+    ) -> None:
+        self.storage_path = storage_path
+        self.handlers = handlers
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self._callback_sender = callback_sender
+        self.lease_seconds = lease_seconds
+        self._owner = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._stopping = False
+        self._threads: List[threading.Thread] = []
+        self._version = 0
+        self._heartbeat_stop = threading.Event()
+
+        self.storage_path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(str(self.storage_path), check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        with self._lock:
+            self._connection.executescript(_SCHEMA)
+            present = {row["name"] for row in self._connection.execute("PRAGMA table_info(jobs)")}
+            for column, column_type in _ADDED_COLUMNS.items():
+                if column not in present:
+                    self._connection.execute(f"ALTER TABLE jobs ADD COLUMN {column} {column_type}")
+            self._connection.commit()
+
+    def submit(self, kind: str, payload: Dict[str, Any], callback_url: Optional[str] = None) -> str:
+        """Persist a new job and return its ID."""
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job_id = uuid.uuid4().hex
+        with self._wakeup:
+            self._connection.execute(
+                "INSERT INTO jobs (id, kind, payload, status, callback_url, created_at) VALUES (?, ?, ?, 'queued', ?, ?)",
+                (job_id, kind, json.dumps(payload, ensure_ascii=False), callback_url, _now()),
+            )
+            self._connection.commit()
+            self._version += 1
+            self._wakeup.notify()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return the public view of a job, or ``None`` if it does not exist."""
+        with self._lock:
+            row = self._connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    @property
+    def version(self) -> int:
+        """Counter bumped on every job state change, for cheap change detection."""
+        return self._version
+
+    def counts(self) -> Dict[str, int]:
+        """Return the number of jobs per status."""
+        with self._lock:
+            rows = self._connection.execute("SELECT status, COUNT(*) AS total FROM jobs GROUP BY status").fetchall()
+        return {row["status"]: row["total"] for row in rows}
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            "job_id": row["id"],
+            "kind": row["kind"],
+            "status": row["status"],
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "callback_url": row["callback_url"],
+            "callback_error": row["callback_error"],
+            "attempts": row["attempts"],
+            "created_at": row["created_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"],
+        }
+
+    def _recover(self) -> None:
+        """Requeue running jobs whose owner stopped heartbeating, failing those out of attempts."""
+        cutoff = (datetime.now(timezone.utc) - timedelta(seconds=self.lease_seconds)).isoformat()
+        stale = "status = 'running' AND (heartbeat_at IS NULL OR heartbeat_at < ?)"
+        with self._lock:
+            failed = self._connection.execute(
+                "UPDATE jobs SET status = 'failed', error = 'Exceeded retry attempts after interruption', "
+                f"finished_at = ?, owner = NULL WHERE {stale} AND attempts >= ?",
+                (_now(), cutoff, self.max_attempts),
+            ).rowcount
+            requeued = self._connection.execute(
+                f"UPDATE jobs SET status = 'queued', owner = NULL WHERE {stale}", (cutoff,)
+            ).rowcount
+            self._connection.commit()
+            if failed or requeued:
+                self._version += 1
+                self._wakeup.notify_all()
+
+    def _heartbeat(self) -> None:
+        """Refresh this queue's running jobs and reclaim jobs abandoned by others."""
+        while not self._heartbeat_stop.wait(self.lease_seconds / 3):
+            with self._lock:
+                self._connection.execute(
+                    "UPDATE jobs SET heartbeat_at = ? WHERE status = 'running' AND owner = ?",
+                    (_now(), self._owner),
+                )
+                self._connection.commit()
+            self._recover()
+
+    def _claim(self) -> Optional[sqlite3.Row]:
+        with self._wakeup:
+            while not self._stopping:
+                row = self._connection.execute(
+                    "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row is not None:
+                    now = _now()
+                    claimed = self._connection.execute(
+                        "UPDATE jobs SET status = 'running', attempts = attempts + 1, started_at = ?, "
+                        "owner = ?, heartbeat_at = ? WHERE id = ? AND status = 'queued'",
+                        (now, self._owner, now, row["id"]),
+                    ).rowcount
+                    self._connection.commit()
+                    if not claimed:
+                        # Another process sharing the file took it first.
+                        continue
+                    self._version += 1
+                    return row
+                self._wakeup.wait(timeout=1.0)
+        return None
+
+    def _finish(self, job_id: str, status: str, result: Optional[Dict[str, Any]], error: Optional[str]) -> None:
+        with self._lock:
+            self._connection.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, owner = NULL WHERE id = ?",
+                (status, json.dumps(result, ensure_ascii=False) if result is not None else None, error, _now(), job_id),
+            )
+            self._connection.commit()
+            self._version += 1
+
+    def _notify(self, job_id: str, callback_url: str) -> None:
+        job = self.get(job_id)
+        try:
+            self._callback_sender(callback_url, job)
+        except Exception as exc:
+            with self._lock:
+                self._connection.execute("UPDATE jobs SET callback_error = ? WHERE id = ?", (str(exc), job_id))
+                self._connection.commit()
+                self._version += 1
+
+    def run_once(self) -> bool:
+        """Run the oldest queued job in the calling thread; ``False`` if none."""
+        with self._lock:
+            if self._connection.execute("SELECT 1 FROM jobs WHERE status = 'queued' LIMIT 1").fetchone() is None:
+                return False
+        row = self._claim()
+        if row is None:
+            return False
+        self._execute(row)
+        return True
+
+    def _execute(self, row: sqlite3.Row) -> None:
+        try:
+            result = self.handlers[row["kind"]](json.loads(row["payload"]))
+        except JobFailed as exc:
+            self._finish(row["id"], exc.status, exc.result, str(exc))
+        except Exception as exc:
+            self._finish(row["id"], "failed", None, str(exc))
+        else:
+            self._finish(row["id"], "succeeded", result, None)
+        if row["callback_url"]:
+            self._notify(row["id"], row["callback_url"])
+
+    def _work(self) -> None:
+        while True:
+            row = self._claim()
+            if row is None:
+                return
+            self._execute(row)
+
+    def start(self) -> None:
+        """Recover interrupted jobs and start the worker threads."""
+        if self._threads:
+            return
+        self._recover()
+        self._stopping = False
+        self._heartbeat_stop.clear()
+        for number in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{number}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        heartbeat = threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True)
+        heartbeat.start()
+        self._threads.append(heartbeat)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Ask workers to exit after their current job."""
+        with self._wakeup:
+            self._stopping = True
+            self._wakeup.notify_all()
+        self._heartbeat_stop.set()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads = []
+
+
+__all__ = ["JobFailed", "JobQueue", "post_callback", "validate_callback_url"]
@@ -0,0 +1,171 @@
+"""Track normalised EXPLAIN plans per query fingerprint and flag regressions."""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+# MariaDB access types from best to worst.
+ACCESS_TYPE_RANK = {
+    access_type: rank
+    for rank, access_type in enumerate(
+        [
+            "system", "const", "eq_ref", "ref", "fulltext", "ref_or_null",
+            "index_merge", "unique_subquery", "index_subquery", "range", "index", "ALL",
+        ]
+    )
+}
+
+# Growth in estimated rows examined that counts as a regression on its own.
+ROWS_REGRESSION_FACTOR = 2.0
+
+EXPLAINABLE_PREFIXES = ("SELECT", "WITH", "UPDATE", "DELETE", "INSERT", "REPLACE")
+
+
+def _as_int(value: Any) -> int:
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def summarize_explain(rows: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Reduce raw EXPLAIN rows to the fields that matter for plan comparison."""
+    steps = []
+    rows_examined = 0
+    fanout: Dict[Any, int] = {}
+    for row in rows:
+        extra = str(row.get("Extra") or row.get("extra") or "")
+        estimated = max(_as_int(row.get("rows")), 1)
+        steps.append({
+            "table": row.get("table"),
+            "type": row.get("type"),
+            "key": row.get("key"),
+            "rows": estimated,
+            "filesort": "Using filesort" in extra,
+            "temporary": "Using temporary" in extra,
+        })
+        # Nested-loop estimate within one SELECT: each step is probed once per
+        # row produced so far. UNION branches, subqueries and derived tables
+        # have their own id and are summed, not multiplied.
+        select_id = row.get("id")
+        fanout[select_id] = fanout.get(select_id, 1) * estimated
+        rows_examined += fanout[select_id]
+    return {"steps": steps, "rows_examined": rows_examined}
+
+
+def compare_plans(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    reference_rows: Optional[int] = None,
+) -> List[str]:
+    """Describe every way ``current`` is worse than ``baseline``.
+
+    Row growth is measured against ``reference_rows`` when given, otherwise
+    against the baseline's own estimate.
+    """
+    changes: List[str] = []
+    before_by_table = {step["table"]: step for step in baseline.get("steps", [])}
+    for step in current.get("steps", []):
+        table = step["table"]
+        before = before_by_table.get(table)
+        if before is None:
+            continue
+        before_rank = ACCESS_TYPE_RANK.get(before["type"], -1)
+        after_rank = ACCESS_TYPE_RANK.get(step["type"], -1)
+        # A different key only counts when it did not buy a better access path.
+        if before["key"] != step["key"] and after_rank >= before_rank and step["rows"] >= before["rows"]:
+            changes.append(f"{table}: key changed from {before['key']} to {step['key']}")
+        if after_rank > before_rank >= 0:
+            changes.append(f"{table}: access type degraded from {before['type']} to {step['type']}")
+        if step["filesort"] and not before["filesort"]:
+            changes.append(f"{table}: new filesort")
+        if step["temporary"] and not before["temporary"]:
+            changes.append(f"{table}: new temporary table")
+
+    before_rows = reference_rows if reference_rows is not None else baseline.get("rows_examined", 0)
+    after_rows = current.get("rows_examined", 0)
+    if before_rows and after_rows >= before_rows * ROWS_REGRESSION_FACTOR:
+        changes.append(f"estimated rows examined grew from {before_rows} to {after_rows}")
+    return changes
+
+
+class PlanTracker:
+    """Keep a baseline and latest plan per fingerprint, in memory."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._records: Dict[str, Dict[str, Any]] = {}
+
+    def record(
+        self,
+        fingerprint: str,
+        sql_query: str,
+        plan: Dict[str, Any],
+        timestamp: Optional[str] = None,
+    ) -> List[str]:
+        """Store ``plan`` for ``fingerprint`` and return its regressions vs. the baseline.
+
+        The baseline is the first plan seen, and moves forward whenever a new
+        plan is not worse than it, so improvements become the new reference.
+        Row growth is always measured against the smallest estimate of any
+        baseline, so gradual growth below the factor per sample still adds up.
+        """
+        with self._lock:
+            record = self._records.get(fingerprint)
+            if record is None:
+                self._records[fingerprint] = {
+                    "fingerprint": fingerprint,
+                    "sql_query": sql_query,
+                    "baseline": plan,
+                    "baseline_at": timestamp,
+                    "best_rows": plan.get("rows_examined", 0),
+                    "latest": plan,
+                    "latest_at": timestamp,
+                    "changes": [],
+                    "samples": 1,
+                }
+                return []
+
+            changes = compare_plans(record["baseline"], plan, reference_rows=record["best_rows"])
+            record.update({
+                "sql_query": sql_query,
+                "latest": plan,
+                "latest_at": timestamp,
+                "changes": changes,
+                "samples": record["samples"] + 1,
+            })
+            if not changes:
+                record["baseline"] = plan
+                record["baseline_at"] = timestamp
+                rows_examined = plan.get("rows_examined", 0)
+                record["best_rows"] = min(record["best_rows"], rows_examined) if record["best_rows"] else rows_examined
+            return changes
+
+    def load(self, entries: Iterable[Dict[str, Any]]) -> None:
+        """Replay stored history entries that carry a plan."""
+        for entry in entries:
+            self.add_history_entry(entry)
+
+    def add_history_entry(self, entry: Dict[str, Any]) -> None:
+        """Replay one stored history entry if it carries a plan."""
+        plan = entry.get("plan")
+        fingerprint = entry.get("fingerprint")
+        if plan and fingerprint:
+            sql_query = (entry.get("request") or {}).get("sql_query", "")
+            self.record(fingerprint, sql_query, plan, entry.get("timestamp"))
+
+    def regressions(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Return regressed fingerprints, worst estimated rows examined first."""
+        with self._lock:
+            regressed = [dict(record) for record in self._records.values() if record["changes"]]
+        regressed.sort(key=lambda record: record["latest"].get("rows_examined", 0), reverse=True)
+        return regressed[:limit] if limit > 0 else []
+
+
+__all__ = [
+    "EXPLAINABLE_PREFIXES",
+    "PlanTracker",
+    "compare_plans",
+    "summarize_explain",
+]
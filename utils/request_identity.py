@@ -0,0 +1,138 @@
+"""Decide which priority class and client a request is scheduled as.
+
+The class is decided by the server, never by the caller: requests carrying a
+configured API key get that key's class, requests carrying a signed session
+cookie issued by the bundled UI page are ``interactive``, and everything else
+is ``api``. A caller may still ask for a *lower* class with
+``X-Priority-Class`` (for example CI marking itself ``bulk``).
+
+Clients are keyed by API key name or by network address. ``X-Forwarded-For``
+is only read when the direct peer is a configured trusted proxy, and then
+the nearest address that is not itself a trusted proxy is used.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import ipaddress
+import secrets
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+from .scheduler import PRIORITY_CLASSES
+
+Network = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+Caller = Tuple[str, str]
+
+UI_SESSION_COOKIE = "ui_session"
+DEFAULT_CLASS = "api"
+
+
+def parse_networks(value: str) -> List[Network]:
+    """Parse a comma-separated list of networks or addresses."""
+    return [ipaddress.ip_network(part.strip(), strict=False) for part in value.split(",") if part.strip()]
+
+
+def parse_api_keys(value: str) -> Dict[str, Tuple[str, str]]:
+    """Parse ``name:class:key`` entries into ``{key: (name, class)}``."""
+    keys: Dict[str, Tuple[str, str]] = {}
+    for entry in value.split(","):
+        if not entry.strip():
+            continue
+        name, priority, key = (part.strip() for part in entry.split(":", 2))
+        if priority not in PRIORITY_CLASSES:
+            raise ValueError(f"Unknown priority class {priority!r} for API key {name!r}")
+        if not name or not key:
+            raise ValueError("API key entries must look like name:class:key")
+        keys[key] = (name, priority)
+    return keys
+
+
+def _in_networks(host: Optional[str], networks: Sequence[Network]) -> bool:
+    try:
+        address = ipaddress.ip_address((host or "").strip())
+    except ValueError:
+        return False
+    return any(address in network for network in networks)
+
+
+def client_address(peer: Optional[str], forwarded_for: Optional[str], trusted_proxies: Sequence[Network]) -> str:
+    """Return the originating address, trusting ``X-Forwarded-For`` only via trusted proxies."""
+    if not peer:
+        return "anonymous"
+    if not forwarded_for or not _in_networks(peer, trusted_proxies):
+        return peer
+    # Each proxy appends the address it received from, so walk right to left
+    # and stop at the first hop that is not one of ours.
+    for hop in reversed([part.strip() for part in forwarded_for.split(",") if part.strip()]):
+        if not _in_networks(hop, trusted_proxies):
+            return hop
+    return peer
+
+
+def _rank(priority: str) -> int:
+    return PRIORITY_CLASSES.index(priority)
+
+
+class CallerResolver:
+    """Map request headers, cookies and peer address to a scheduler caller."""
+
+    def __init__(
+        self,
+        api_keys: Optional[Mapping[str, Tuple[str, str]]] = None,
+        trusted_proxies: Sequence[Network] = (),
+        session_secret: Optional[str] = None,
+    ) -> None:
+        self.api_keys = dict(api_keys or {})
+        self.trusted_proxies = list(trusted_proxies)
+        # A per-process secret only means UI sessions end on restart.
+        self._secret = (session_secret or secrets.token_hex(32)).encode("utf-8")
+
+    def _sign(self, session_id: str) -> str:
+        return hmac.new(self._secret, session_id.encode("utf-8"), hashlib.sha256).hexdigest()
+
+    def issue_session(self) -> str:
+        """Return a new signed UI session token for the ``ui_session`` cookie."""
+        session_id = secrets.token_hex(16)
+        return f"{session_id}.{self._sign(session_id)}"
+
+    def valid_session(self, token: Optional[str]) -> bool:
+        """Return ``True`` if ``token`` was issued by :meth:`issue_session`."""
+        session_id, _, signature = (token or "").partition(".")
+        return bool(session_id and signature) and hmac.compare_digest(signature, self._sign(session_id))
+
+    def resolve(
+        self,
+        headers: Mapping[str, str],
+        cookies: Mapping[str, str],
+        peer: Optional[str],
+    ) -> Caller:
+        """Return the ``(priority class, client id)`` for one request.
+
+        ``headers`` must be case-insensitive (or use lower-case names).
+        """
+        address = client_address(peer, headers.get("x-forwarded-for"), self.trusted_proxies)
+        key = headers.get("x-api-key")
+        if key and key in self.api_keys:
+            name, priority = self.api_keys[key]
+            # Key holders are trusted to split their own traffic into clients.
+            sub_client = headers.get("x-client-id")
+            client_id = f"key:{name}/{sub_client}" if sub_client else f"key:{name}"
+        elif self.valid_session(cookies.get(UI_SESSION_COOKIE)):
+            priority, client_id = "interactive", address
+        else:
+            priority, client_id = DEFAULT_CLASS, address
+
+        requested = (headers.get("x-priority-class") or "").lower()
+        if requested in PRIORITY_CLASSES and _rank(requested) > _rank(priority):
+            priority = requested
+        return priority, client_id
+
+
+__all__ = [
+    "CallerResolver",
+    "UI_SESSION_COOKIE",
+    "client_address",
+    "parse_api_keys",
+    "parse_networks",
+]
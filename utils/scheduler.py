@@ -0,0 +1,194 @@
+"""Priority scheduling of agent (LLM) calls across traffic classes."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import Counter, deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, Optional
+
+PRIORITY_CLASSES = ("interactive", "api", "bulk")
+DEFAULT_WEIGHTS = {"interactive": 16, "api": 4, "bulk": 1}
+
+
+class _Waiter:
+    __slots__ = ("priority", "client_id", "enqueued_at", "granted", "loop", "future")
+
+    def __init__(self, priority: str, client_id: str, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        self.priority = priority
+        self.client_id = client_id
+        self.enqueued_at = time.monotonic()
+        self.granted = False
+        # Async waiters are woken through their event loop instead of the condition.
+        self.loop = loop
+        self.future: Optional[asyncio.Future] = loop.create_future() if loop else None
+
+    def wake(self) -> None:
+        if self.future is not None:
+            self.loop.call_soon_threadsafe(_resolve, self.future)
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+def _percentile(samples: Deque[float], fraction: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class PriorityScheduler:
+    """Grant a fixed number of concurrent slots using weighted fair queuing.
+
+    Each class keeps a FIFO of waiters and a virtual clock that advances by
+    ``1 / weight`` per grant; a free slot goes to the eligible class with the
+    lowest clock, so under contention classes share capacity in proportion to
+    their weights and idle capacity is always used. A waiter is preferred
+    while its client holds fewer than ``client_limit`` slots; a client over
+    its limit only gets capacity that no other waiter can use.
+
+    ``async_slot`` waits on the event loop, so queued requests do not hold a
+    server worker thread while they wait.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 4,
+        weights: Optional[Dict[str, int]] = None,
+        client_limit: int = 2,
+        wait_samples: int = 1000,
+    ) -> None:
+        self.capacity = capacity
+        self.weights = dict(weights or DEFAULT_WEIGHTS)
+        self.client_limit = client_limit
+        self._condition = threading.Condition()
+        self._queues: Dict[str, Deque[_Waiter]] = {name: deque() for name in self.weights}
+        self._virtual: Dict[str, float] = {name: 0.0 for name in self.weights}
+        self._clock = 0.0
+        self._active = 0
+        self._active_by_class: Counter = Counter()
+        self._active_by_client: Counter = Counter()
+        self._served: Counter = Counter()
+        self._waits: Dict[str, Deque[float]] = {name: deque(maxlen=wait_samples) for name in self.weights}
+
+    def _eligible(self, priority: str, enforce_client_limit: bool = True) -> Optional[_Waiter]:
+        for waiter in self._queues[priority]:
+            if not enforce_client_limit or self._active_by_client[waiter.client_id] < self.client_limit:
+                return waiter
+        return None
+
+    def _pick(self, enforce_client_limit: bool) -> Optional[_Waiter]:
+        best: Optional[_Waiter] = None
+        for priority in self.weights:
+            waiter = self._eligible(priority, enforce_client_limit)
+            if waiter and (best is None or self._virtual[priority] < self._virtual[best.priority]):
+                best = waiter
+        return best
+
+    def _dispatch(self) -> None:
+        granted = False
+        while self._active < self.capacity:
+            # Client quotas only bite under contention; otherwise the slot would idle.
+            best = self._pick(enforce_client_limit=True) or self._pick(enforce_client_limit=False)
+            if best is None:
+                break
+
+            priority = best.priority
+            self._queues[priority].remove(best)
+            self._clock = self._virtual[priority]
+            self._virtual[priority] += 1.0 / self.weights[priority]
+            self._active += 1
+            self._active_by_class[priority] += 1
+            self._active_by_client[best.client_id] += 1
+            self._served[priority] += 1
+            self._waits[priority].append(time.monotonic() - best.enqueued_at)
+            best.granted = True
+            best.wake()
+            granted = True
+        if granted:
+            self._condition.notify_all()
+
+    def _enqueue(self, waiter: _Waiter) -> None:
+        """Queue ``waiter`` and dispatch; the caller holds the condition."""
+        priority = waiter.priority
+        if not self._queues[priority] and not self._active_by_class[priority]:
+            # A class returning from idle must not spend credit it banked while away.
+            self._virtual[priority] = max(self._virtual[priority], self._clock)
+        self._queues[priority].append(waiter)
+        self._dispatch()
+
+    def _release(self, priority: str, client_id: str) -> None:
+        with self._condition:
+            self._active -= 1
+            self._active_by_class[priority] -= 1
+            self._active_by_client[client_id] -= 1
+            if not self._active_by_client[client_id]:
+                del self._active_by_client[client_id]
+            self._dispatch()
+
+    def _check(self, priority: str) -> None:
+        if priority not in self.weights:
+            raise ValueError(f"Unknown priority class: {priority}")
+
+    @contextmanager
+    def slot(self, priority: str = "api", client_id: str = "anonymous") -> Iterator[None]:
+        """Block until a slot is granted to ``priority``/``client_id``, then hold it."""
+        self._check(priority)
+        waiter = _Waiter(priority, client_id)
+        with self._condition:
+            self._enqueue(waiter)
+            while not waiter.granted:
+                self._condition.wait()
+        try:
+            yield
+        finally:
+            self._release(priority, client_id)
+
+    @asynccontextmanager
+    async def async_slot(self, priority: str = "api", client_id: str = "anonymous") -> AsyncIterator[None]:
+        """Await a slot without blocking a thread, then hold it."""
+        self._check(priority)
+        waiter = _Waiter(priority, client_id, loop=asyncio.get_running_loop())
+        with self._condition:
+            self._enqueue(waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            # The request went away while queued (or just as it was granted).
+            with self._condition:
+                granted = waiter.granted
+                if not granted:
+                    self._queues[priority].remove(waiter)
+            if granted:
+                self._release(priority, client_id)
+            raise
+        try:
+            yield
+        finally:
+            self._release(priority, client_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth, active slots and wait-time percentiles per class."""
+        with self._condition:
+            classes = {}
+            for priority in self.weights:
+                waits = self._waits[priority]
+                p50 = _percentile(waits, 0.5)
+                p95 = _percentile(waits, 0.95)
+                classes[priority] = {
+                    "weight": self.weights[priority],
+                    "queued": len(self._queues[priority]),
+                    "active": self._active_by_class[priority],
+                    "served": self._served[priority],
+                    "wait_p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+                    "wait_p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+                }
+            return {"capacity": self.capacity, "active": self._active, "classes": classes}
+
+
+__all__ = ["DEFAULT_WEIGHTS", "PRIORITY_CLASSES", "PriorityScheduler"]
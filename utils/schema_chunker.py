@@ -0,0 +1,376 @@
+"""Split large schema dumps into token-budgeted chunks and find cross-table issues."""
+
+from __future__ import annotations
+
+import math
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from .sql_parsing import Token, identifier, tokenize
+
+# Rough characters-per-token ratio for SQL DDL; errs on the side of overcounting.
+CHARS_PER_TOKEN = 3.5
+
+# Output tokens allowed per chunk review, relative to the chunk's input size.
+MAP_OUTPUT_RATIO = 0.5
+MAP_OUTPUT_MIN_TOKENS = 500
+MAP_OUTPUT_MAX_TOKENS = 2000
+
+# Prompt tokens of chunk reports merged in one reduce call, and the output
+# allowed per merge, which grows with the number of reports it covers.
+REDUCE_INPUT_TOKENS = 12000
+REDUCE_OUTPUT_MIN_TOKENS = 1500
+REDUCE_OUTPUT_PER_REPORT = 100
+REDUCE_OUTPUT_MAX_TOKENS = 4000
+
+# Statements worth reviewing; mysqldump also emits DROP TABLE, SET, LOCK
+# TABLES, INSERT and /*!...*/ directives that only spend chunk budget.
+_SCHEMA_STATEMENT_WORDS = {"CREATE", "ALTER"}
+
+_CONSTRAINT_WORDS = {"CONSTRAINT", "PRIMARY", "KEY", "INDEX", "UNIQUE", "FOREIGN", "FULLTEXT", "SPATIAL", "CHECK", "PERIOD"}
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the prompt tokens ``text`` will cost without calling the API."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def map_output_tokens(chunk: str) -> int:
+    """Output-token budget for reviewing ``chunk``, so larger chunks are not truncated."""
+    budget = int(estimate_tokens(chunk) * MAP_OUTPUT_RATIO)
+    return max(MAP_OUTPUT_MIN_TOKENS, min(MAP_OUTPUT_MAX_TOKENS, budget))
+
+
+def reduce_output_tokens(report_count: int) -> int:
+    """Output-token budget for merging ``report_count`` chunk reports."""
+    budget = REDUCE_OUTPUT_MIN_TOKENS + REDUCE_OUTPUT_PER_REPORT * max(report_count - 1, 0)
+    return min(REDUCE_OUTPUT_MAX_TOKENS, budget)
+
+
+def group_reports(reports: List[str], token_budget: int = REDUCE_INPUT_TOKENS) -> List[List[str]]:
+    """Pack reports into batches of at most ``token_budget`` estimated tokens.
+
+    Every batch except a trailing single report holds at least two reports,
+    so repeated merging always shrinks the list.
+    """
+    batches: List[List[str]] = []
+    current: List[str] = []
+    current_tokens = 0
+    for report in reports:
+        report_tokens = estimate_tokens(report)
+        if len(current) >= 2 and current_tokens + report_tokens > token_budget:
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(report)
+        current_tokens += report_tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def is_schema_statement(statement: str) -> bool:
+    """Return ``True`` for DDL that defines schema (``CREATE``/``ALTER``)."""
+    tokens = tokenize(statement)
+    return bool(tokens) and tokens[0].kind == "word" and tokens[0].upper in _SCHEMA_STATEMENT_WORDS
+
+
+def split_statements(sql: str) -> List[str]:
+    """Split a dump on top-level semicolons, ignoring those in strings and comments."""
+    statements: List[str] = []
+    start = 0
+    index = 0
+    length = len(sql)
+    while index < length:
+        char = sql[index]
+        if char in ("'", '"', "`"):
+            index += 1
+            while index < length and sql[index] != char:
+                index += 2 if sql[index] == "\\" and char != "`" else 1
+        elif sql.startswith("--", index) or char == "#":
+            newline = sql.find("\n", index)
+            index = length if newline < 0 else newline
+        elif sql.startswith("/*", index):
+            end = sql.find("*/", index + 2)
+            index = length if end < 0 else end + 1
+        elif char == ";":
+            statement = sql[start:index].strip()
+            if statement:
+                statements.append(statement + ";")
+            start = index + 1
+        index += 1
+    tail = sql[start:].strip()
+    if tail:
+        statements.append(tail)
+    return statements
+
+
+def column_list(tokens: List[Token], index: int) -> Tuple[List[str], int]:
+    """Read ``(a, b(10), c DESC)`` starting at ``index``; return names and the next index."""
+    columns: List[str] = []
+    depth = 0
+    expect_name = True
+    while index < len(tokens):
+        token = tokens[index]
+        if token.value == "(":
+            depth += 1
+            expect_name = depth == 1
+        elif token.value == ")":
+            depth -= 1
+            if depth == 0:
+                return columns, index + 1
+        elif token.value == "," and depth == 1:
+            expect_name = True
+        elif expect_name and depth == 1 and token.kind in ("word", "name"):
+            columns.append(identifier(token))
+            expect_name = False
+        index += 1
+    return columns, index
+
+
+def parse_table(statement: str) -> Optional[Dict[str, Any]]:
+    """Extract name, column types, indexes and foreign keys from a CREATE TABLE."""
+    tokens = tokenize(statement)
+    position = 0
+    while position < len(tokens) and not tokens[position].is_keyword("TABLE"):
+        position += 1
+    if position >= len(tokens) or not any(token.is_keyword("CREATE") for token in tokens[:position]):
+        return None
+    position += 1
+    while position < len(tokens) and tokens[position].is_keyword("IF", "NOT", "EXISTS"):
+        position += 1
+    if position >= len(tokens):
+        return None
+    name = identifier(tokens[position])
+    position += 1
+    while position + 1 < len(tokens) and tokens[position].value == ".":
+        name = identifier(tokens[position + 1])
+        position += 2
+
+    table: Dict[str, Any] = {"name": name, "columns": {}, "indexes": [], "foreign_keys": []}
+    while position < len(tokens) and tokens[position].value != "(":
+        position += 1
+    position += 1
+
+    # Walk the definitions one comma-separated item at a time at depth 1.
+    while position < len(tokens):
+        token = tokens[position]
+        if token.value == ")":
+            break
+        if token.value == ",":
+            position += 1
+            continue
+
+        upper = token.upper if token.kind == "word" else ""
+        if upper in _CONSTRAINT_WORDS:
+            is_foreign = False
+            is_primary = upper == "PRIMARY"
+            while position < len(tokens) and tokens[position].value != "(":
+                if tokens[position].is_keyword("FOREIGN"):
+                    is_foreign = True
+                if tokens[position].is_keyword("PRIMARY"):
+                    is_primary = True
+                position += 1
+            columns, position = column_list(tokens, position)
+            if is_foreign:
+                while position < len(tokens) and not tokens[position].is_keyword("REFERENCES") and tokens[position].value not in (",", ")"):
+                    position += 1
+                if position + 1 < len(tokens) and tokens[position].is_keyword("REFERENCES"):
+                    position += 1
+                    referenced = identifier(tokens[position])
+                    position += 1
+                    while position + 1 < len(tokens) and tokens[position].value == ".":
+                        referenced = identifier(tokens[position + 1])
+                        position += 2
+                    referenced_columns, position = column_list(tokens, position)
+                    table["foreign_keys"].append({
+                        "columns": columns,
+                        "references": referenced,
+                        "referenced_columns": referenced_columns,
+                    })
+            elif columns:
+                table["indexes"].append({"columns": columns, "primary": is_primary})
+            position = _skip_item(tokens, position)
+            continue
+        elif token.kind in ("word", "name"):
+            column = identifier(token)
+            position += 1
+            type_parts: List[str] = []
+            if position < len(tokens) and tokens[position].kind == "word":
+                type_parts.append(tokens[position].value.lower())
+                position += 1
+                if position < len(tokens) and tokens[position].value == "(":
+                    arguments, position = _type_arguments(tokens, position)
+                    type_parts[-1] += f"({arguments})"
+                if position < len(tokens) and tokens[position].is_keyword("UNSIGNED"):
+                    type_parts.append("unsigned")
+                    position += 1
+            table["columns"][column] = " ".join(type_parts)
+            inline_primary = False
+            depth = 0
+            while position < len(tokens):
+                current = tokens[position]
+                if current.value == "(":
+                    depth += 1
+                elif current.value == ")":
+                    if depth == 0:
+                        break
+                    depth -= 1
+                elif current.value == "," and depth == 0:
+                    break
+                elif current.is_keyword("PRIMARY"):
+                    inline_primary = True
+                elif current.is_keyword("UNIQUE"):
+                    table["indexes"].append({"columns": [column], "primary": False})
+                elif current.is_keyword("REFERENCES") and position + 1 < len(tokens):
+                    referenced_columns, _ = column_list(tokens, position + 2)
+                    table["foreign_keys"].append({
+                        "columns": [column],
+                        "references": identifier(tokens[position + 1]),
+                        "referenced_columns": referenced_columns,
+                    })
+                position += 1
+            if inline_primary:
+                table["indexes"].append({"columns": [column], "primary": True})
+            continue
+        position += 1
+    return table
+
+
+def _skip_item(tokens: List[Token], index: int) -> int:
+    """Advance to the ``,`` or ``)`` that ends the current definition item."""
+    depth = 0
+    while index < len(tokens):
+        value = tokens[index].value
+        if value == "(":
+            depth += 1
+        elif value == ")":
+            if depth == 0:
+                return index
+            depth -= 1
+        elif value == "," and depth == 0:
+            return index
+        index += 1
+    return index
+
+
+def _type_arguments(tokens: List[Token], index: int) -> Tuple[str, int]:
+    parts: List[str] = []
+    index += 1
+    while index < len(tokens) and tokens[index].value != ")":
+        parts.append(tokens[index].value)
+        index += 1
+    return "".join(parts), index + 1
+
+
+def _unsized(column_type: str) -> str:
+    """Drop display widths such as ``int(11)`` that MariaDB ignores for integers."""
+    return re.sub(r"^((?:tiny|small|medium|big)?int)\(\d+\)", r"\1", column_type)
+
+
+def cross_table_findings(tables: Dict[str, Dict[str, Any]]) -> List[str]:
+    """Find FK problems that are only visible when looking across tables."""
+    findings: List[str] = []
+    for name, table in tables.items():
+        leading = [index["columns"] for index in table["indexes"]]
+        for foreign_key in table["foreign_keys"]:
+            columns = foreign_key["columns"]
+            label = f"{name}({', '.join(columns)}) -> {foreign_key['references']}"
+            if not any(index[: len(columns)] == columns for index in leading):
+                findings.append(
+                    f"FK index gap: {label} has no index with these leading columns; "
+                    "InnoDB will add an implicit one, declare it explicitly so it can be shared."
+                )
+            parent = tables.get(foreign_key["references"])
+            if parent is None:
+                findings.append(f"Dangling FK: {label} references a table that is not in this dump.")
+                continue
+            for child_column, parent_column in zip(columns, foreign_key["referenced_columns"]):
+                child_type = _unsized(table["columns"].get(child_column, ""))
+                parent_type = _unsized(parent["columns"].get(parent_column, ""))
+                if child_type and parent_type and child_type != parent_type:
+                    findings.append(
+                        f"FK type mismatch: {name}.{child_column} is {child_type} but "
+                        f"{foreign_key['references']}.{parent_column} is {parent_type}."
+                    )
+            parent_keys = [index["columns"] for index in parent["indexes"]]
+            referenced = foreign_key["referenced_columns"]
+            if referenced and not any(index[: len(referenced)] == referenced for index in parent_keys):
+                findings.append(
+                    f"Unindexed FK target: {foreign_key['references']}({', '.join(referenced)}) "
+                    f"referenced by {name} is not the leading part of any key."
+                )
+    return findings
+
+
+def build_chunks(schema_sql: str, token_budget: int = 3000) -> Tuple[List[str], List[str]]:
+    """Group DDL by foreign-key cluster and pack clusters into token-budgeted chunks.
+
+    Returns the chunks and the cross-table findings computed over the whole dump.
+    """
+    statements = [statement for statement in split_statements(schema_sql) if is_schema_statement(statement)]
+    tables: Dict[str, Dict[str, Any]] = {}
+    statement_table: List[Optional[str]] = []
+    for statement in statements:
+        table = parse_table(statement)
+        statement_table.append(table["name"] if table else None)
+        if table:
+            tables[table["name"]] = table
+
+    # Union-find over FK edges so related tables land in the same chunk.
+    parent = {name: name for name in tables}
+
+    def find(name: str) -> str:
+        while parent[name] != name:
+            parent[name] = parent[parent[name]]
+            name = parent[name]
+        return name
+
+    for name, table in tables.items():
+        for foreign_key in table["foreign_keys"]:
+            if foreign_key["references"] in parent:
+                parent[find(name)] = find(foreign_key["references"])
+
+    clusters: Dict[str, List[str]] = {}
+    loose: List[str] = []
+    for statement, name in zip(statements, statement_table):
+        if name is None:
+            loose.append(statement)
+        else:
+            clusters.setdefault(find(name), []).append(statement)
+
+    units: List[List[str]] = list(clusters.values())
+    if loose:
+        units.append(loose)
+
+    chunks: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    for unit in units:
+        unit_tokens = sum(estimate_tokens(statement) for statement in unit)
+        # Oversized clusters are split table by table.
+        pieces = [unit] if unit_tokens <= token_budget else [[statement] for statement in unit]
+        for piece in pieces:
+            piece_tokens = sum(estimate_tokens(statement) for statement in piece)
+            if current and current_tokens + piece_tokens > token_budget:
+                chunks.append("\n\n".join(current))
+                current, current_tokens = [], 0
+            current.extend(piece)
+            current_tokens += piece_tokens
+    if current:
+        chunks.append("\n\n".join(current))
+
+    return chunks, cross_table_findings(tables)
+
+
+__all__ = [
+    "build_chunks",
+    "column_list",
+    "cross_table_findings",
+    "estimate_tokens",
+    "group_reports",
+    "is_schema_statement",
+    "map_output_tokens",
+    "parse_table",
+    "reduce_output_tokens",
+    "split_statements",
+]
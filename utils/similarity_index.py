@@ -0,0 +1,134 @@
+"""MinHash/LSH index over previously optimized queries."""
+
+from __future__ import annotations
+
+import hashlib
+import random
+import threading
+from collections import defaultdict
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from .sql_parsing import normalize_tokens, shape_tokens, tokenize
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def shingles(tokens: List[str], size: int = 3) -> FrozenSet[int]:
+    """Return hashed ``size``-grams of normalized statement tokens."""
+    if len(tokens) < size:
+        grams = [" ".join(tokens)] if tokens else []
+    else:
+        grams = [" ".join(tokens[start:start + size]) for start in range(len(tokens) - size + 1)]
+    return frozenset(
+        int.from_bytes(hashlib.blake2b(gram.encode("utf-8"), digest_size=4).digest(), "big")
+        for gram in grams
+    )
+
+
+class SimilarQueryIndex:
+    """Find previously optimized queries whose shape is close to a new one.
+
+    Each stored query is reduced to a MinHash signature over its normalized
+    token shingles; signatures are split into LSH bands so a lookup only
+    scores entries that share at least one band with the probe.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, shingle_size: int = 3, seed: int = 7) -> None:
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        self.shingle_size = shingle_size
+        generator = random.Random(seed)
+        self._permutations = [
+            (generator.randrange(1, _MERSENNE_PRIME), generator.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._shingles: Dict[str, FrozenSet[int]] = {}
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], Set[str]] = defaultdict(set)
+        self._entry_bands: Dict[str, List[Tuple[int, Tuple[int, ...]]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _signature(self, hashed: FrozenSet[int]) -> List[int]:
+        if not hashed:
+            return [_MAX_HASH] * self.num_perm
+        return [
+            min(((a * value + b) % _MERSENNE_PRIME) & _MAX_HASH for value in hashed)
+            for a, b in self._permutations
+        ]
+
+    def _bands(self, signature: List[int]) -> List[Tuple[int, Tuple[int, ...]]]:
+        step = self.rows_per_band
+        return [(band, tuple(signature[band * step:(band + 1) * step])) for band in range(self.bands)]
+
+    def add(self, sql_query: str, optimized_query: str, rationale: str = "", timestamp: Optional[str] = None) -> None:
+        """Index an optimized query; a later result for the same shape replaces it."""
+        tokens = tokenize(sql_query)
+        shape = normalize_tokens(tokens)
+        if not shape or not optimized_query:
+            return
+        hashed = shingles(shape_tokens(tokens), self.shingle_size)
+        bands = self._bands(self._signature(hashed))
+
+        with self._lock:
+            for key in self._entry_bands.pop(shape, []):
+                self._buckets[key].discard(shape)
+            self._entries[shape] = {
+                "sql_query": sql_query.strip(),
+                "optimized_query": optimized_query,
+                "optimization_rationale": rationale,
+                "timestamp": timestamp,
+            }
+            self._shingles[shape] = hashed
+            self._entry_bands[shape] = bands
+            for key in bands:
+                self._buckets[key].add(shape)
+
+    def add_history_entry(self, entry: Dict[str, Any]) -> None:
+        """Index a history record if it carries a successfully optimized query."""
+        if entry.get("type") not in ("analysis", "optimize") or entry.get("optimized") is False:
+            return
+        sql_query = (entry.get("request") or {}).get("sql_query", "")
+        response = entry.get("response") or {}
+        optimized_query = (response.get("optimized_query") or "").strip()
+        if not optimized_query or optimized_query == sql_query.strip():
+            return
+        if optimized_query.startswith("Error") or "Optimized SQL Query:" in optimized_query:
+            # Entries written before the success flag may hold error text or unsplit output.
+            return
+        self.add(sql_query, optimized_query, response.get("optimization_rationale", ""), entry.get("timestamp"))
+
+    def query(self, sql_query: str, limit: int = 3, min_similarity: float = 0.5) -> List[Dict[str, Any]]:
+        """Return the closest indexed queries by Jaccard similarity of shingles."""
+        tokens = tokenize(sql_query)
+        shape = normalize_tokens(tokens)
+        if not shape or limit <= 0:
+            return []
+        hashed = shingles(shape_tokens(tokens), self.shingle_size)
+        bands = self._bands(self._signature(hashed))
+
+        with self._lock:
+            candidates: Set[str] = set()
+            for key in bands:
+                candidates.update(self._buckets.get(key, ()))
+            scored = []
+            for candidate in candidates:
+                other = self._shingles[candidate]
+                union = len(hashed | other)
+                similarity = len(hashed & other) / union if union else 0.0
+                if similarity >= min_similarity:
+                    scored.append((similarity, candidate))
+            scored.sort(reverse=True)
+            return [
+                {**self._entries[candidate], "similarity": round(similarity, 4), "exact_shape": candidate == shape}
+                for similarity, candidate in scored[:limit]
+            ]
+
+
+__all__ = ["SimilarQueryIndex", "shingles"]
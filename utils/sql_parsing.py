@@ -0,0 +1,120 @@
+"""Lightweight SQL tokenizing and normalisation helpers."""
+
+from __future__ import annotations
+
+import hashlib
+import re
+from typing import List, NamedTuple
+
+_TOKEN_PATTERN = re.compile(
+    r"""
+      (?P<ws>\s+)
+    | (?P<comment>--[^\n]*|\#[^\n]*|/\*.*?\*/)
+    | (?P<string>'(?:[^'\\]|\\.|'')*'|"(?:[^"\\]|\\.|"")*")
+    | (?P<number>0[xX][0-9A-Fa-f]+|\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)
+    | (?P<name>`(?:[^`]|``)+`)
+    | (?P<word>[A-Za-z_$@][A-Za-z0-9_$@]*)
+    | (?P<op><=>|<=|>=|<>|!=|:=|\|\||&&|[-+*/%=<>!(),.;?|&^~])
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+_IN_LIST_PATTERN = re.compile(r"\(\?(?:,\?)+\)")
+
+KEYWORDS = frozenset(
+    """
+    ALL AND AS ASC BETWEEN BY CASE CROSS DELETE DESC DISTINCT ELSE END EXISTS
+    FOR FORCE FROM FULL GROUP HAVING IGNORE IN INDEX INNER INSERT INTO IS JOIN
+    KEY LEFT LIKE LIMIT LOCK NATURAL NOT NULL OFFSET ON OR ORDER OUTER OVER
+    PARTITION REPLACE RIGHT ROWS SELECT SET SHARE STRAIGHT_JOIN THEN UNION
+    UPDATE USE USING VALUES WHEN WHERE WINDOW WITH XOR
+    """.split()
+)
+
+
+class Token(NamedTuple):
+    """A single lexical token; ``kind`` is one of string/number/name/word/op."""
+
+    kind: str
+    value: str
+
+    @property
+    def upper(self) -> str:
+        return self.value.upper()
+
+    def is_keyword(self, *keywords: str) -> bool:
+        return self.kind == "word" and self.value.upper() in keywords
+
+
+def tokenize(sql: str) -> List[Token]:
+    """Split SQL into tokens, dropping whitespace and comments."""
+    tokens: List[Token] = []
+    for match in _TOKEN_PATTERN.finditer(sql or ""):
+        kind = match.lastgroup
+        if kind in ("ws", "comment"):
+            continue
+        value = match.group()
+        if kind == "name":
+            value = value[1:-1].replace("``", "`")
+        tokens.append(Token(kind, value))
+    return tokens
+
+
+def identifier(token: Token) -> str:
+    """Return the canonical (lower-case) spelling of an identifier token."""
+    return token.value.lower()
+
+
+def shape_tokens(tokens: List[Token]) -> List[str]:
+    """Return token texts with literals replaced by ``?`` and keywords upper-cased."""
+    parts: List[str] = []
+    for token in tokens:
+        if token.kind in ("string", "number") or token.value == "?":
+            text = "?"
+        elif token.kind == "word":
+            upper = token.value.upper()
+            text = upper if upper in KEYWORDS else token.value.lower()
+        elif token.kind == "name":
+            text = token.value.lower()
+        else:
+            text = token.value
+        parts.append(text)
+
+    while parts and parts[-1] == ";":
+        parts.pop()
+    return parts
+
+
+def normalize_tokens(tokens: List[Token]) -> str:
+    """Render tokens as a literal-free statement shape."""
+    parts = shape_tokens(tokens)
+
+    rendered: List[str] = []
+    for text in parts:
+        if rendered and text not in (".", ",", ")") and rendered[-1] not in (".", "("):
+            rendered.append(" ")
+        rendered.append(text)
+    shape = "".join(rendered)
+    return _IN_LIST_PATTERN.sub("(?+)", shape.replace(", ", ","))
+
+
+def normalize_sql(sql: str) -> str:
+    """Return the literal-free shape of ``sql`` used for grouping queries."""
+    return normalize_tokens(tokenize(sql))
+
+
+def fingerprint_sql(sql: str) -> str:
+    """Return a short stable hash identifying the shape of ``sql``."""
+    return hashlib.sha1(normalize_sql(sql).encode("utf-8")).hexdigest()[:16]
+
+
+__all__ = [
+    "KEYWORDS",
+    "Token",
+    "fingerprint_sql",
+    "identifier",
+    "normalize_sql",
+    "normalize_tokens",
+    "shape_tokens",
+    "tokenize",
+]
@@ -0,0 +1,331 @@
+"""Periodic storage and index-usage statistics for cost analysis."""
+
+from __future__ import annotations
+
+import json
+import re
+import threading
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+QueryRunner = Callable[[str], Optional[Iterable[Dict[str, Any]]]]
+
+_IDENTIFIER_PATTERN = re.compile(r"^[A-Za-z0-9_$]+$")
+
+TABLE_STATS_SQL = """
+SELECT TABLE_NAME AS table_name,
+       ENGINE AS engine,
+       TABLE_ROWS AS table_rows,
+       DATA_LENGTH AS data_length,
+       INDEX_LENGTH AS index_length,
+       DATA_FREE AS data_free
+FROM information_schema.TABLES
+WHERE TABLE_SCHEMA = '{database}' AND TABLE_TYPE = 'BASE TABLE'
+"""
+
+INDEX_USAGE_SQL = """
+SELECT OBJECT_NAME AS table_name,
+       INDEX_NAME AS index_name,
+       COUNT_READ AS count_read,
+       COUNT_WRITE AS count_write
+FROM performance_schema.table_io_waits_summary_by_index_usage
+WHERE OBJECT_SCHEMA = '{database}' AND INDEX_NAME IS NOT NULL
+"""
+
+INDEX_SIZE_SQL = """
+SELECT table_name AS table_name,
+       index_name AS index_name,
+       stat_value * @@innodb_page_size AS index_bytes
+FROM mysql.innodb_index_stats
+WHERE database_name = '{database}' AND stat_name = 'size'
+"""
+
+INDEX_UNIQUENESS_SQL = """
+SELECT DISTINCT TABLE_NAME AS table_name,
+       INDEX_NAME AS index_name,
+       NON_UNIQUE AS non_unique
+FROM information_schema.STATISTICS
+WHERE TABLE_SCHEMA = '{database}'
+"""
+
+# performance_schema counters start from zero when the server restarts.
+UPTIME_SQL = "SHOW GLOBAL STATUS LIKE 'Uptime'"
+
+# Tables with at least this share of reclaimable space are reported as fragmented.
+FRAGMENTATION_THRESHOLD = 0.1
+# Ignore fragmentation on tables where the reclaimable space is negligible.
+FRAGMENTATION_MIN_BYTES = 10 * 1024 * 1024
+
+
+def _as_int(value: Any) -> int:
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def build_snapshot(
+    database: str,
+    table_rows: Iterable[Dict[str, Any]],
+    index_usage_rows: Optional[Iterable[Dict[str, Any]]] = None,
+    index_size_rows: Optional[Iterable[Dict[str, Any]]] = None,
+    collected_at: Optional[str] = None,
+    index_uniqueness_rows: Optional[Iterable[Dict[str, Any]]] = None,
+    uptime_seconds: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Normalise raw catalog rows into a snapshot dictionary.
+
+    ``index_usage_rows`` and ``index_size_rows`` may be ``None`` when
+    ``performance_schema`` or the InnoDB statistics tables are unavailable.
+    ``index_uniqueness_rows`` come from ``information_schema.STATISTICS`` and
+    mark indexes that enforce a constraint; ``uptime_seconds`` is how long the
+    usage counters have been accumulating.
+    """
+    tables: Dict[str, Dict[str, Any]] = {}
+    for row in table_rows:
+        name = row.get("table_name")
+        if not name:
+            continue
+        data_bytes = _as_int(row.get("data_length"))
+        index_bytes = _as_int(row.get("index_length"))
+        free_bytes = _as_int(row.get("data_free"))
+        allocated = data_bytes + index_bytes + free_bytes
+        tables[name] = {
+            "engine": row.get("engine"),
+            "rows": _as_int(row.get("table_rows")),
+            "data_bytes": data_bytes,
+            "index_bytes": index_bytes,
+            "free_bytes": free_bytes,
+            "fragmentation": round(free_bytes / allocated, 4) if allocated else 0.0,
+        }
+
+    indexes: Optional[Dict[str, Dict[str, Any]]] = None
+    if index_usage_rows is not None or index_size_rows is not None:
+        indexes = {}
+        for row in index_usage_rows or []:
+            key = f"{row.get('table_name')}.{row.get('index_name')}"
+            entry = indexes.setdefault(key, {})
+            entry["reads"] = _as_int(row.get("count_read"))
+            entry["writes"] = _as_int(row.get("count_write"))
+        for row in index_size_rows or []:
+            key = f"{row.get('table_name')}.{row.get('index_name')}"
+            indexes.setdefault(key, {})["bytes"] = _as_int(row.get("index_bytes"))
+        for row in index_uniqueness_rows or []:
+            key = f"{row.get('table_name')}.{row.get('index_name')}"
+            if key in indexes and str(row.get("non_unique")) == "0":
+                indexes[key]["unique"] = True
+
+    return {
+        "database": database,
+        "collected_at": collected_at or datetime.now(timezone.utc).isoformat(),
+        "tables": tables,
+        "indexes": indexes,
+        "uptime_seconds": uptime_seconds,
+    }
+
+
+def diff_snapshots(previous: Optional[Dict[str, Any]], current: Dict[str, Any]) -> Dict[str, Any]:
+    """Return per-table growth between two snapshots, omitting unchanged tables."""
+    if not previous:
+        return {"since": None, "tables": {}, "new_tables": [], "dropped_tables": []}
+
+    previous_tables = previous.get("tables", {})
+    current_tables = current.get("tables", {})
+    changes: Dict[str, Dict[str, int]] = {}
+    for name, stats in current_tables.items():
+        before = previous_tables.get(name)
+        if before is None:
+            continue
+        delta = {
+            field: stats[field] - before.get(field, 0)
+            for field in ("rows", "data_bytes", "index_bytes", "free_bytes")
+            if stats[field] != before.get(field, 0)
+        }
+        if delta:
+            changes[name] = delta
+
+    return {
+        "since": previous.get("collected_at"),
+        "tables": changes,
+        "new_tables": sorted(set(current_tables) - set(previous_tables)),
+        "dropped_tables": sorted(set(previous_tables) - set(current_tables)),
+    }
+
+
+def summarize_snapshot(
+    current: Dict[str, Any],
+    previous: Optional[Dict[str, Any]] = None,
+    limit: int = 10,
+) -> Dict[str, Any]:
+    """Condense a snapshot (and its delta) into a prompt-sized summary."""
+    tables = current.get("tables", {})
+    totals = {
+        "tables": len(tables),
+        "rows": sum(stats["rows"] for stats in tables.values()),
+        "data_bytes": sum(stats["data_bytes"] for stats in tables.values()),
+        "index_bytes": sum(stats["index_bytes"] for stats in tables.values()),
+        "free_bytes": sum(stats["free_bytes"] for stats in tables.values()),
+    }
+
+    largest = sorted(
+        tables.items(),
+        key=lambda item: item[1]["data_bytes"] + item[1]["index_bytes"],
+        reverse=True,
+    )[:limit]
+    fragmented = sorted(
+        (
+            (name, stats)
+            for name, stats in tables.items()
+            if stats["fragmentation"] >= FRAGMENTATION_THRESHOLD
+            and stats["free_bytes"] >= FRAGMENTATION_MIN_BYTES
+        ),
+        key=lambda item: item[1]["free_bytes"],
+        reverse=True,
+    )[:limit]
+
+    # Unique indexes enforce constraints even when no query reads them, so
+    # they are never reported as droppable.
+    indexes = current.get("indexes")
+    unused_indexes: Optional[List[Dict[str, Any]]] = None
+    if indexes is not None:
+        unused = [
+            {"index": key, "bytes": stats.get("bytes"), "writes": stats.get("writes", 0)}
+            for key, stats in indexes.items()
+            if "reads" in stats
+            and stats["reads"] == 0
+            and not key.endswith(".PRIMARY")
+            and not stats.get("unique")
+        ]
+        unused.sort(key=lambda item: item["bytes"] or 0, reverse=True)
+        unused_indexes = unused[:limit]
+
+    delta = diff_snapshots(previous, current)
+    growth = sorted(
+        delta["tables"].items(),
+        key=lambda item: abs(item[1].get("data_bytes", 0)) + abs(item[1].get("index_bytes", 0)),
+        reverse=True,
+    )[:limit]
+    delta["tables"] = dict(growth)
+
+    return {
+        "database": current.get("database"),
+        "collected_at": current.get("collected_at"),
+        # Index reads are counted since the last restart; a short uptime means
+        # "unused" may only reflect a quiet window.
+        "server_uptime_seconds": current.get("uptime_seconds"),
+        "totals": totals,
+        "largest_tables": [{"table": name, **stats} for name, stats in largest],
+        "fragmented_tables": [
+            {"table": name, "free_bytes": stats["free_bytes"], "fragmentation": stats["fragmentation"]}
+            for name, stats in fragmented
+        ],
+        "unused_indexes": unused_indexes,
+        "changes": delta,
+    }
+
+
+class StorageStatsCollector:
+    """Snapshot table sizes, fragmentation and index usage on a schedule."""
+
+    def __init__(
+        self,
+        database: str,
+        query_runner: Optional[QueryRunner] = None,
+        interval_seconds: float = 300.0,
+        summary_limit: int = 10,
+    ) -> None:
+        if not database or not _IDENTIFIER_PATTERN.match(database):
+            raise ValueError(f"❌ Invalid database name for storage statistics: {database!r}")
+
+        self.database = database
+        self.interval_seconds = interval_seconds
+        self.summary_limit = summary_limit
+        self._query_runner = query_runner
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._latest: Optional[Dict[str, Any]] = None
+        self._previous: Optional[Dict[str, Any]] = None
+        self.last_error: Optional[str] = None
+
+    def _run(self, sql_template: str) -> Optional[List[Dict[str, Any]]]:
+        runner = self._query_runner
+        if runner is None:
+            # Imported lazily so the collector can be used without a DB driver.
+            from db.mariadb_client import execute_query
+
+            runner = execute_query
+        rows = runner(sql_template.format(database=self.database))
+        return list(rows) if rows is not None else None
+
+    def _uptime(self) -> Optional[int]:
+        for row in self._run(UPTIME_SQL) or []:
+            if str(row.get("Variable_name", "")).lower() == "uptime":
+                return _as_int(row.get("Value"))
+        return None
+
+    def collect(self) -> Dict[str, Any]:
+        """Take a snapshot now and make it the latest one."""
+        table_rows = self._run(TABLE_STATS_SQL)
+        if table_rows is None:
+            raise RuntimeError(f"Unable to read table statistics for {self.database}")
+
+        snapshot = build_snapshot(
+            self.database,
+            table_rows,
+            index_usage_rows=self._run(INDEX_USAGE_SQL),
+            index_size_rows=self._run(INDEX_SIZE_SQL),
+            index_uniqueness_rows=self._run(INDEX_UNIQUENESS_SQL),
+            uptime_seconds=self._uptime(),
+        )
+        with self._lock:
+            self._previous = self._latest
+            self._latest = snapshot
+        return snapshot
+
+    def summary(self) -> Optional[Dict[str, Any]]:
+        """Return the compact summary of the latest snapshot, if any."""
+        with self._lock:
+            latest, previous = self._latest, self._previous
+        if latest is None:
+            return None
+        return summarize_snapshot(latest, previous, limit=self.summary_limit)
+
+    def summary_text(self) -> str:
+        """Return the latest summary serialised for inclusion in a prompt."""
+        summary = self.summary()
+        if summary is None:
+            return ""
+        return json.dumps(summary, separators=(",", ":"), ensure_ascii=False)
+
+    def _loop(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.collect()
+                self.last_error = None
+            except Exception as exc:
+                self.last_error = str(exc)
+            self._stop_event.wait(self.interval_seconds)
+
+    def start(self) -> None:
+        """Start collecting in a background daemon thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name="storage-stats", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+__all__ = [
+    "StorageStatsCollector",
+    "build_snapshot",
+    "diff_snapshots",
+    "summarize_snapshot",
+]
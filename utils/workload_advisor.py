@@ -0,0 +1,595 @@
+"""Workload-level composite index recommendations.
+
+Queries are grouped by their literal-free shape, parsed once per shape for
+equality, range, join, GROUP BY and ORDER BY columns, and weighted by how
+often they occur. A greedy pass then picks the composite indexes whose
+column prefixes serve the most weight, skipping anything an existing or
+already-chosen index covers.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from .schema_chunker import column_list, parse_table, split_statements
+from .sql_parsing import Token, identifier, normalize_tokens, tokenize
+
+_CLAUSE_KEYWORDS = {
+    "SELECT": "select",
+    "FROM": "from",
+    "JOIN": "from",
+    "STRAIGHT_JOIN": "from",
+    "UPDATE": "from",
+    "INTO": "other",
+    "ON": "where",
+    "WHERE": "where",
+    "HAVING": "other",
+    "SET": "other",
+    "LIMIT": "other",
+    "UNION": "other",
+    "VALUES": "other",
+    "USING": "other",
+}
+_EQUALITY_OPS = {"=", "<=>", "IN", "IS"}
+_RANGE_OPS = {"<", ">", "<=", ">=", "BETWEEN", "LIKE"}
+_TABLE_STOP_WORDS = {
+    "AS", "ON", "USING", "WHERE", "GROUP", "ORDER", "HAVING", "LIMIT", "JOIN",
+    "INNER", "LEFT", "RIGHT", "CROSS", "NATURAL", "STRAIGHT_JOIN", "FULL", "OUTER",
+    "SET", "UNION", "FORCE", "USE", "IGNORE", "WINDOW", "FOR", "LOCK", "PARTITION",
+}
+
+# Words that can sit where a column would but never name one.
+_NON_COLUMN_WORDS = {
+    "NOT", "NULL", "AND", "OR", "XOR", "CASE", "EXISTS", "ASC", "DESC",
+    "TRUE", "FALSE", "UNKNOWN", "DEFAULT", "INTERVAL", "DISTINCT", "ALL", "ANY", "SOME",
+}
+
+TableColumns = Dict[str, List[str]]
+
+# Existing indexes of the connected database, one row per indexed column.
+INDEX_STATISTICS_SQL = """
+SELECT TABLE_NAME AS table_name,
+       INDEX_NAME AS index_name,
+       SEQ_IN_INDEX AS seq_in_index,
+       COLUMN_NAME AS column_name
+FROM information_schema.STATISTICS
+WHERE TABLE_SCHEMA = DATABASE()
+"""
+
+
+class QueryFeatures:
+    """Indexable columns referenced by one query shape, keyed by table."""
+
+    __slots__ = ("tables", "equality", "range", "join", "group_by", "order_by")
+
+    def __init__(self) -> None:
+        self.tables: List[str] = []
+        self.equality: TableColumns = defaultdict(list)
+        self.range: TableColumns = defaultdict(list)
+        self.join: TableColumns = defaultdict(list)
+        self.group_by: List[Tuple[str, str]] = []
+        self.order_by: List[Tuple[str, str]] = []
+
+    @staticmethod
+    def _add(target: TableColumns, table: str, column: str) -> None:
+        if column not in target[table]:
+            target[table].append(column)
+
+
+def _read_column(tokens: Sequence[Token], index: int) -> Tuple[Optional[Tuple[Optional[str], str]], int]:
+    """Parse ``col`` or ``qualifier.col`` at ``index``; return it and the next index."""
+    token = tokens[index]
+    if token.kind not in ("word", "name") or (
+        token.kind == "word" and (token.is_keyword(*_CLAUSE_KEYWORDS, *_NON_COLUMN_WORDS) or token.value.startswith("@"))
+    ):
+        # Keywords, boolean literals and @user/@@system variables are not columns.
+        return None, index + 1
+    parts = [identifier(token)]
+    position = index + 1
+    while (
+        position + 1 < len(tokens)
+        and tokens[position].value == "."
+        and tokens[position + 1].kind in ("word", "name")
+    ):
+        parts.append(identifier(tokens[position + 1]))
+        position += 2
+    if position < len(tokens) and tokens[position].value == "(":
+        return None, position  # function call, not sargable
+    qualifier = parts[-2] if len(parts) > 1 else None
+    return (qualifier, parts[-1]), position
+
+
+def _skip_parentheses(tokens: Sequence[Token], index: int) -> int:
+    """Return the index just past the ``)`` matching the ``(`` at ``index``."""
+    depth = 0
+    while index < len(tokens):
+        if tokens[index].value == "(":
+            depth += 1
+        elif tokens[index].value == ")":
+            depth -= 1
+            if depth == 0:
+                return index + 1
+        index += 1
+    return index
+
+
+class _Scope:
+    """Tables, aliases and column references of one SELECT (query, subquery or CTE body)."""
+
+    __slots__ = ("tables", "aliases", "references", "parent")
+
+    def __init__(self, parent: Optional["_Scope"] = None) -> None:
+        self.tables: List[str] = []
+        self.aliases: Dict[str, str] = {}
+        # (kind, qualifier, column, predicate group)
+        self.references: List[Tuple[str, Optional[str], str, Optional[int]]] = []
+        self.parent = parent
+
+
+def extract_features(
+    tokens: Sequence[Token],
+    table_columns: Optional[Dict[str, Set[str]]] = None,
+) -> QueryFeatures:
+    """Collect predicate, join, grouping and ordering columns from ``tokens``.
+
+    Tables and aliases are resolved per SELECT scope, so subqueries and CTE
+    bodies neither hide nor borrow the outer query's tables. An unqualified
+    column belongs to the scope table that has it in ``table_columns`` (from
+    DDL), or else to the scope's first table. CTE names are not tables, and
+    predicates combined with ``OR`` are skipped since a composite index
+    cannot serve them.
+    """
+    table_columns = table_columns or {}
+    features = QueryFeatures()
+    cte_names: Set[str] = set()
+    scope = _Scope()
+    finished: List[_Scope] = []
+    # Parenthesis frames: (clause to restore, group to restore, opened a scope).
+    frames: List[Tuple[str, Optional[int], bool]] = []
+    group_parent: List[Optional[int]] = []
+    group_has_or: List[bool] = []
+    group: Optional[int] = None
+    clause = "other"
+    expect_table = False
+    expect_cte = False
+    total = len(tokens)
+    index = 0
+
+    def new_group(parent: Optional[int]) -> int:
+        group_parent.append(parent)
+        group_has_or.append(False)
+        return len(group_parent) - 1
+
+    while index < total:
+        token = tokens[index]
+        value = token.value
+
+        if value == "(" and clause in ("group", "order"):
+            # Function arguments and expressions do not make the term an index column.
+            index = _skip_parentheses(tokens, index)
+            continue
+        if value == "(":
+            opens_scope = index + 1 < total and tokens[index + 1].is_keyword("SELECT", "WITH")
+            frames.append((clause, group, opens_scope))
+            if opens_scope:
+                scope = _Scope(scope)
+                clause, group = "other", None
+            elif clause == "where":
+                group = new_group(group)
+            expect_table = False
+            index += 1
+            continue
+        if value == ")":
+            if frames:
+                clause, group, opened_scope = frames.pop()
+                if opened_scope and scope.parent is not None:
+                    finished.append(scope)
+                    scope = scope.parent
+            else:
+                clause = "other"
+            index += 1
+            continue
+        if value == ",":
+            expect_table = clause == "from"
+            expect_cte = clause == "cte"
+            index += 1
+            continue
+
+        if clause == "cte":
+            if expect_cte and token.kind in ("word", "name") and not token.is_keyword("RECURSIVE"):
+                cte_names.add(identifier(token))
+                expect_cte = False
+                index += 1
+                if index < total and tokens[index].value == "(":
+                    index = _skip_parentheses(tokens, index)  # column list
+                continue
+            if not token.is_keyword("SELECT"):
+                index += 1
+                continue
+
+        if token.kind == "word":
+            upper = token.upper
+            if upper in ("GROUP", "ORDER") and index + 1 < total and tokens[index + 1].is_keyword("BY"):
+                clause = "group" if upper == "GROUP" else "order"
+                index += 2
+                continue
+            if upper == "WITH" and clause not in ("group", "order"):
+                clause, expect_cte = "cte", True
+                index += 1
+                continue
+            if upper == "DELETE":
+                clause = "from"
+                index += 1
+                continue
+            if upper in _CLAUSE_KEYWORDS:
+                clause = _CLAUSE_KEYWORDS[upper]
+                expect_table = clause == "from"
+                if clause == "where":
+                    group = new_group(None)
+                index += 1
+                continue
+
+        if expect_table:
+            expect_table = False
+            if token.kind in ("word", "name") and not token.is_keyword(*_TABLE_STOP_WORDS):
+                name = identifier(token)
+                index += 1
+                while index + 1 < total and tokens[index].value == "." and tokens[index + 1].kind in ("word", "name"):
+                    name = identifier(tokens[index + 1])
+                    index += 2
+                if name not in scope.tables:
+                    scope.tables.append(name)
+                scope.aliases[name] = name
+                if index < total and tokens[index].is_keyword("AS"):
+                    index += 1
+                if index < total and tokens[index].kind in ("word", "name") and not tokens[index].is_keyword(*_TABLE_STOP_WORDS, *_CLAUSE_KEYWORDS, "GROUP", "ORDER"):
+                    scope.aliases[identifier(tokens[index])] = name
+                    index += 1
+                continue
+
+        if clause == "where":
+            if token.is_keyword("OR", "XOR") or value == "||":
+                if group is not None:
+                    group_has_or[group] = True
+                index += 1
+                continue
+            column, after = _read_column(tokens, index)
+            if column is None:
+                index = after
+                continue
+            operator = tokens[after].upper if after < total else ""
+            if operator == "NOT" or (operator == "IS" and after + 1 < total and tokens[after + 1].is_keyword("NOT")):
+                # Negated predicates rarely narrow an index range.
+                index = after + 1
+                continue
+            if operator in _EQUALITY_OPS or operator in _RANGE_OPS:
+                rhs_index = after + 1
+                if operator == "=" and rhs_index < total:
+                    other, rhs_after = _read_column(tokens, rhs_index)
+                    if other is not None:
+                        scope.references.append(("join", column[0], column[1], group))
+                        scope.references.append(("join", other[0], other[1], group))
+                        index = rhs_after
+                        continue
+                if operator == "LIKE" and rhs_index < total:
+                    literal = tokens[rhs_index]
+                    if literal.kind != "string" or literal.value[1:2] in ("%", "_"):
+                        index = rhs_index + 1
+                        continue
+                kind = "equality" if operator in _EQUALITY_OPS else "range"
+                scope.references.append((kind, column[0], column[1], group))
+                index = rhs_index
+                continue
+            index = after
+            continue
+
+        if clause in ("group", "order"):
+            column, after = _read_column(tokens, index)
+            if column is not None and (after >= total or tokens[after].value in (",", ")", ";") or tokens[after].is_keyword("ASC", "DESC", "LIMIT", "HAVING", "WITH", "UNION", "ORDER", "WINDOW", "FOR")):
+                scope.references.append((clause, column[0], column[1], None))
+            index = after
+            continue
+
+        index += 1
+
+    while scope.parent is not None:
+        finished.append(scope)
+        scope = scope.parent
+    finished.append(scope)
+
+    def disjunctive(group_id: Optional[int]) -> bool:
+        while group_id is not None:
+            if group_has_or[group_id]:
+                return True
+            group_id = group_parent[group_id]
+        return False
+
+    def resolve(owner: _Scope, qualifier: Optional[str], column: str) -> Optional[str]:
+        if qualifier is not None:
+            current: Optional[_Scope] = owner
+            while current is not None:
+                if qualifier in current.aliases:
+                    table = current.aliases[qualifier]
+                    return None if table in cte_names else table
+                current = current.parent
+            return None
+        tables = [table for table in owner.tables if table not in cte_names]
+        if not tables:
+            return None
+        described = [table for table in tables if table in table_columns]
+        for table in described:
+            if column in table_columns[table]:
+                return table
+        # With every table described and no match, the column is not theirs.
+        return tables[0] if len(described) < len(tables) else None
+
+    for owner in reversed(finished):
+        for table in owner.tables:
+            if table not in cte_names and table not in features.tables:
+                features.tables.append(table)
+        for kind, qualifier, column, group_id in owner.references:
+            if kind in ("equality", "range", "join") and disjunctive(group_id):
+                continue
+            table = resolve(owner, qualifier, column)
+            if table is None:
+                continue
+            if kind == "equality":
+                QueryFeatures._add(features.equality, table, column)
+            elif kind == "range":
+                QueryFeatures._add(features.range, table, column)
+            elif kind == "join":
+                QueryFeatures._add(features.join, table, column)
+            elif kind == "group":
+                features.group_by.append((table, column))
+            else:
+                features.order_by.append((table, column))
+    return features
+
+
+class WorkloadIndexAdvisor:
+    """Accumulate a query workload and recommend a compact set of indexes.
+
+    Existing indexes come from ``existing_indexes``, :meth:`add_schema` (DDL)
+    or :meth:`add_index_statistics` (``information_schema.STATISTICS`` rows).
+    Tables the advisor knows nothing about are assumed to have the
+    conventional ``PRIMARY KEY (id)`` unless ``assume_id_primary_key`` is off.
+    """
+
+    def __init__(
+        self,
+        max_indexes: int = 10,
+        max_columns: int = 4,
+        min_share: float = 0.01,
+        existing_indexes: Optional[Dict[str, List[List[str]]]] = None,
+        assume_id_primary_key: bool = True,
+    ) -> None:
+        self.max_indexes = max_indexes
+        self.max_columns = max_columns
+        self.min_share = min_share
+        self.assume_id_primary_key = assume_id_primary_key
+        self.existing_indexes: Dict[str, List[Tuple[str, ...]]] = {}
+        for table, indexes in (existing_indexes or {}).items():
+            for columns in indexes:
+                self._add_existing(table, columns)
+        self.table_columns: Dict[str, Set[str]] = {}
+        self._shape_counts: Counter = Counter()
+        self._shape_tokens: Dict[str, List[Token]] = {}
+        self._shape_features: Dict[str, QueryFeatures] = {}
+
+    def _add_existing(self, table: str, columns: Sequence[str]) -> None:
+        key = tuple(column.lower() for column in columns)
+        indexes = self.existing_indexes.setdefault(table.lower(), [])
+        if key and key not in indexes:
+            indexes.append(key)
+
+    def _reextract(self) -> None:
+        # Column ownership may have changed, so re-resolve shapes seen so far.
+        self._shape_features = {
+            shape: extract_features(tokens, self.table_columns) for shape, tokens in self._shape_tokens.items()
+        }
+
+    def add_schema(self, schema_sql: str) -> None:
+        """Learn columns, keys and indexes from ``CREATE TABLE``/``CREATE INDEX`` DDL."""
+        for statement in split_statements(schema_sql):
+            table = parse_table(statement)
+            if table is not None:
+                name = table["name"]
+                self.table_columns[name] = set(table["columns"])
+                self.existing_indexes.setdefault(name, [])
+                for index in table["indexes"]:
+                    self._add_existing(name, index["columns"])
+                for foreign_key in table["foreign_keys"]:
+                    # InnoDB creates an index for a foreign key that lacks one.
+                    columns = tuple(column.lower() for column in foreign_key["columns"])
+                    if not any(index[: len(columns)] == columns for index in self.existing_indexes[name]):
+                        self._add_existing(name, columns)
+                continue
+            tokens = tokenize(statement)
+            if tokens and tokens[0].is_keyword("CREATE") and any(token.is_keyword("INDEX") for token in tokens[:4]):
+                position = next((number for number, token in enumerate(tokens) if token.is_keyword("ON")), None)
+                if position is not None and position + 1 < len(tokens):
+                    position += 1
+                    name = identifier(tokens[position])
+                    while position + 2 < len(tokens) and tokens[position + 1].value == ".":
+                        name = identifier(tokens[position + 2])
+                        position += 2
+                    columns, _ = column_list(tokens, position + 1)
+                    self._add_existing(name, columns)
+        self._reextract()
+
+    def add_index_statistics(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """Learn existing indexes from ``information_schema.STATISTICS`` rows."""
+        grouped: Dict[Tuple[str, str], List[Tuple[int, str]]] = defaultdict(list)
+        for row in rows:
+            normalized = {str(key).lower(): value for key, value in row.items()}
+            table, name, column = normalized.get("table_name"), normalized.get("index_name"), normalized.get("column_name")
+            if table and name and column:
+                grouped[(str(table).lower(), str(name))].append((int(normalized.get("seq_in_index") or 0), str(column)))
+        for (table, _), columns in grouped.items():
+            self._add_existing(table, [column for _, column in sorted(columns)])
+
+    def _existing_for(self, table: str) -> List[Tuple[str, ...]]:
+        if table in self.existing_indexes:
+            return self.existing_indexes[table]
+        if self.assume_id_primary_key and table not in self.table_columns:
+            return [("id",)]
+        return []
+
+    def add_query(self, sql: str, count: int = 1) -> None:
+        """Record ``count`` executions of ``sql``."""
+        tokens = tokenize(sql)
+        if not tokens:
+            return
+        shape = normalize_tokens(tokens)
+        if shape not in self._shape_features:
+            self._shape_tokens[shape] = tokens
+            self._shape_features[shape] = extract_features(tokens, self.table_columns)
+        self._shape_counts[shape] += count
+
+    def add_queries(self, queries: Iterable[str]) -> None:
+        """Record a batch of queries, tokenizing each distinct string once."""
+        for sql, count in Counter(queries).items():
+            self.add_query(sql, count)
+
+    def _candidates(self) -> Dict[Tuple[str, Tuple[str, ...]], int]:
+        # Order equality columns by workload-wide frequency so shapes that
+        # filter on overlapping columns share index prefixes.
+        column_weight: Counter = Counter()
+        for shape, features in self._shape_features.items():
+            weight = self._shape_counts[shape]
+            for source in (features.equality, features.join):
+                for table, columns in source.items():
+                    for column in columns:
+                        column_weight[(table, column)] += weight
+
+        candidates: Counter = Counter()
+        for shape, features in self._shape_features.items():
+            weight = self._shape_counts[shape]
+            for table in features.tables:
+                leading = set(features.equality.get(table, [])) | set(features.join.get(table, []))
+                columns = sorted(leading, key=lambda column: (-column_weight[(table, column)], column))
+                for existing in self._existing_for(table):
+                    # Equality columns can go in any order; reuse an existing one.
+                    if leading and set(existing[: len(leading)]) == leading:
+                        columns = list(existing[: len(leading)])
+                        break
+
+                trailing: List[str] = []
+                for ordering in (features.group_by, features.order_by):
+                    if ordering and all(owner == table for owner, _ in ordering):
+                        trailing = [column for _, column in ordering]
+                        break
+                if not trailing and features.range.get(table):
+                    trailing = features.range[table][:1]
+                for column in trailing:
+                    if column not in columns:
+                        columns.append(column)
+
+                columns = columns[: self.max_columns]
+                if columns:
+                    candidates[(table, tuple(columns))] += weight
+        return candidates
+
+    def _covered_by_existing(self, table: str, columns: Tuple[str, ...]) -> bool:
+        return any(index[: len(columns)] == columns for index in self._existing_for(table))
+
+    def recommend(self) -> Dict[str, Any]:
+        """Return recommended indexes plus redundant existing ones."""
+        candidates = self._candidates()
+        total_weight = sum(self._shape_counts.values())
+        remaining = {key: weight for key, weight in candidates.items() if not self._covered_by_existing(*key)}
+
+        chosen: List[Tuple[str, Tuple[str, ...]]] = []
+        while remaining and len(chosen) < self.max_indexes:
+            def benefit(key: Tuple[str, Tuple[str, ...]]) -> int:
+                table, columns = key
+                return sum(remaining.get((table, columns[:size]), 0) for size in range(1, len(columns) + 1))
+
+            best = max(remaining, key=lambda key: (benefit(key), -len(key[1]), key))
+            if benefit(best) < self.min_share * total_weight:
+                break
+            chosen.append(best)
+            table, columns = best
+            for size in range(1, len(columns) + 1):
+                remaining.pop((table, columns[:size]), None)
+
+        # Drop chosen indexes that are a strict prefix of another chosen one.
+        pruned = [
+            (table, columns)
+            for table, columns in chosen
+            if not any(
+                other_table == table and len(other) > len(columns) and other[: len(columns)] == columns
+                for other_table, other in chosen
+            )
+        ]
+
+        recommendations = []
+        for table, columns in pruned:
+            served = sum(
+                weight
+                for (candidate_table, candidate), weight in candidates.items()
+                if candidate_table == table and columns[: len(candidate)] == candidate
+            )
+            recommendations.append({
+                "table": table,
+                "columns": list(columns),
+                "weight": served,
+                "share": round(served / total_weight, 4) if total_weight else 0.0,
+                "ddl": (
+                    f"CREATE INDEX {quote_identifier(index_name(table, columns))} ON {quote_identifier(table)} "
+                    f"({', '.join(quote_identifier(column) for column in columns)});"
+                ),
+            })
+        recommendations.sort(key=lambda item: item["weight"], reverse=True)
+
+        redundant = []
+        for table, indexes in self.existing_indexes.items():
+            longer = indexes + [columns for chosen_table, columns in pruned if chosen_table == table]
+            for columns in indexes:
+                if any(len(other) > len(columns) and other[: len(columns)] == columns for other in longer):
+                    redundant.append({"table": table, "columns": list(columns)})
+
+        return {
+            "queries_analyzed": total_weight,
+            "distinct_shapes": len(self._shape_counts),
+            "indexes": recommendations,
+            "redundant_existing_indexes": redundant,
+        }
+
+
+def quote_identifier(name: str) -> str:
+    """Backtick-quote ``name`` for use in MariaDB DDL."""
+    return "`" + name.replace("`", "``") + "`"
+
+
+def index_name(table: str, columns: Sequence[str]) -> str:
+    """Build a MariaDB-safe (<= 64 chars, ``[a-z0-9_]``) index name."""
+    return re.sub(r"[^a-z0-9_]", "_", f"idx_{table}_{'_'.join(columns)}".lower())[:64]
+
+
+def format_index_plan(plan: Dict[str, Any]) -> str:
+    """Render a recommendation result as text for the schema advisor."""
+    lines = [
+        f"Workload: {plan['queries_analyzed']} queries across {plan['distinct_shapes']} distinct shapes.",
+        "Proposed indexes (share of workload served):",
+    ]
+    for item in plan["indexes"]:
+        lines.append(f"- {item['ddl']} -- {item['share']:.1%}")
+    if plan["redundant_existing_indexes"]:
+        lines.append("Existing indexes made redundant by a longer prefix:")
+        for item in plan["redundant_existing_indexes"]:
+            lines.append(f"- {item['table']} ({', '.join(item['columns'])})")
+    return "\n".join(lines)
+
+
+__all__ = [
+    "INDEX_STATISTICS_SQL",
+    "QueryFeatures",
+    "WorkloadIndexAdvisor",
+    "extract_features",
+    "format_index_plan",
+    "index_name",
+    "quote_identifier",
+]